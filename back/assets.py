@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from back.config import ASSETS_MANIFEST, ASSETS_ROOT, FRONTEND_ROOT, STATIC_URL
+
+# Длина хеша содержимого в имени файла
+HASH_LENGTH = 10
+
+# Логическое имя ("src/form.js") -> путь внутри front/ ("dist/src/form.1a2b3c4d5e.js")
+MANIFEST: dict[str, str] = {}
+_loaded = False
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    base, extension = os.path.splitext(name)
+    return f"{base}.{digest}{extension}"
+
+
+def read_manifest(path: str = ASSETS_MANIFEST) -> dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_manifest(path: str = ASSETS_MANIFEST):
+    global _loaded
+    MANIFEST.clear()
+    MANIFEST.update(read_manifest(path))
+    _loaded = True
+
+
+def asset(name: str) -> str:
+    """URL файла из front/ по логическому имени.
+
+    Если файл есть в манифесте, возвращается адрес копии с хешем в
+    имени, иначе - обычный путь внутри STATIC_URL.
+    """
+    if not _loaded:
+        load_manifest()
+    return STATIC_URL + MANIFEST.get(name, name)
+
+
+def _write_atomic(target: str, write):
+    temporary = f"{target}.{os.getpid()}.tmp"
+    write(temporary)
+    os.replace(temporary, target)
+
+
+def build(root: str = FRONTEND_ROOT, output: str = ASSETS_ROOT, manifest_path: str = ASSETS_MANIFEST) -> dict[str, str]:
+    """Копирует файлы из root в output под именами с хешем содержимого
+    и записывает манифест.
+
+    Уже существующие копии не перезаписываются: одинаковое имя означает
+    одинаковое содержимое. Файлы предыдущей сборки сохраняются, чтобы
+    страницы, отданные до перезапуска, могли догрузить свои ресурсы;
+    более старые удаляются.
+    """
+    previous = read_manifest(manifest_path)
+    manifest = {}
+    for directory, names, files in os.walk(root):
+        # Не собираем собственный результат и скрытые каталоги
+        names[:] = [
+            name for name in names
+            if not name.startswith(".") and os.path.join(directory, name) != output
+        ]
+        for name in files:
+            if name.startswith(".") or name.endswith((".gz", ".br", ".tmp")):
+                continue
+            path = os.path.join(directory, name)
+            logical = os.path.relpath(path, root).replace(os.sep, "/")
+            target_relative = os.path.join(os.path.relpath(output, root), hashed_name(logical, file_hash(path)))
+            manifest[logical] = target_relative.replace(os.sep, "/")
+            target = os.path.join(root, target_relative)
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                _write_atomic(target, lambda temporary: shutil.copyfile(path, temporary))
+
+    keep = {os.path.join(root, path) for path in (*manifest.values(), *previous.values())}
+    keep.add(manifest_path)
+    for directory, _, files in os.walk(output):
+        for name in files:
+            path = os.path.join(directory, name)
+            original = path.removesuffix(".gz").removesuffix(".br")
+            if original not in keep:
+                os.remove(path)
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+
+    def write_manifest(temporary: str):
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    _write_atomic(manifest_path, write_manifest)
+    if manifest_path == ASSETS_MANIFEST:
+        load_manifest(manifest_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    result = build()
+    logging.info(f"Собрано файлов: {len(result)}")
@@ -0,0 +1,311 @@
+import asyncio
+import html
+import inspect
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from email.parser import BytesParser
+from email.utils import formatdate
+from http import HTTPStatus
+from http.client import HTTPMessage
+from http.cookies import SimpleCookie
+from http.server import DEFAULT_ERROR_CONTENT_TYPE, DEFAULT_ERROR_MESSAGE
+from urllib.parse import urlparse
+
+from sqlmodel import Session
+
+from back.config import (
+    DEFAULT_URL, KEEPALIVE_MAX_REQUESTS, KEEPALIVE_TIMEOUT, SERVER_BACKLOG,
+    SERVER_REUSE_PORT, SERVER_WORKERS, STATIC_URL, engine,
+)
+from back.compression import negotiate_response
+from back.custom_types import FileContent, Request, Response, body_length
+from back.handler import HTTPHandler, error_response
+from back.static import static_response
+
+# Максимальный размер строки запроса вместе с заголовками
+MAX_HEADER_SIZE = 65536
+
+SERVER_VERSION = f"{HTTPHandler.server_version} {HTTPHandler.sys_version}"
+
+
+class AsyncRequestHandler:
+    """Запрос asyncio-движка с тем же интерфейсом, что у HTTPHandler.
+
+    Этого достаточно для get_kwargs и validation_error_response, поэтому
+    обработчики, зарегистрированные через HTTPHandler.route, работают
+    без изменений.
+    """
+
+    def __init__(self, command: str, path: str, query: str, headers: HTTPMessage, body: bytes):
+        self.command = command
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.rfile = io.BytesIO(body)
+        self.path_params = {}
+        self._session = None
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            self._session = Session(engine)
+        return self._session
+
+    def close_session(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def req(self) -> Request:
+        headers = dict(self.headers)
+        return Request(
+            headers=headers,
+            cookie=SimpleCookie(headers.get("Cookie", "")),
+            method=self.command,
+            path=self.path,
+            query=self.query,
+            body=self.body,
+            params=self.path_params,
+        )
+
+
+def error_page(code: int, explain: str | None = None) -> Response:
+    status = HTTPStatus(code)
+    content = DEFAULT_ERROR_MESSAGE % {
+        "code": code,
+        "message": html.escape(status.phrase, quote=False),
+        "explain": html.escape(explain or status.description, quote=False),
+    }
+    return Response(code, {"Content-Type": DEFAULT_ERROR_CONTENT_TYPE}, SimpleCookie(), content)
+
+
+def encode_head(response: Response, length: int | None, keep_alive: bool) -> bytes:
+    """length=None - тело потоковое и передается блоками (chunked)."""
+    status = HTTPStatus(response.status)
+    lines = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Server: {SERVER_VERSION}",
+        f"Date: {formatdate(usegmt=True)}",
+    ]
+    for name, value in response.headers.items():
+        lines.append(f"{name}: {value}")
+    for name in response.cookie:
+        response.cookie[name]["path"] = DEFAULT_URL
+        lines.append(f"Set-Cookie: {response.cookie[name].OutputString()}")
+    if length is None:
+        lines.append("Transfer-Encoding: chunked")
+    elif response.status not in (204, 304):
+        lines.append(f"Content-Length: {length}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1", "strict")
+
+
+def encode_response(response: Response, keep_alive: bool) -> bytes:
+    content = b"".join(response.body())
+    return encode_head(response, len(content), keep_alive) + content
+
+
+async def write_stream(writer: asyncio.StreamWriter, response: Response, keep_alive: bool, executor):
+    """Отдает потоковое тело блоками (chunked). Итератор может обращаться
+    к базе, поэтому следующий блок вычисляется в пуле потоков."""
+    loop = asyncio.get_running_loop()
+    writer.write(encode_head(response, None, keep_alive))
+    # Части уже склеены в блоки negotiate_response
+    chunks = iter(response.content)
+    while True:
+        try:
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+        except Exception:
+            logging.exception("Ошибка при потоковой отдаче ответа")
+            # Без завершающего блока клиент увидит неполный ответ
+            raise ConnectionAbortedError
+        if chunk is None:
+            break
+        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def write_response(writer: asyncio.StreamWriter, response: Response, keep_alive: bool):
+    parts = response.body()
+    if not any(isinstance(part, FileContent) for part in parts):
+        writer.write(encode_head(response, body_length(parts), keep_alive) + b"".join(parts))
+        await writer.drain()
+        return
+    writer.write(encode_head(response, body_length(parts), keep_alive))
+    loop = asyncio.get_running_loop()
+    for part in parts:
+        if isinstance(part, FileContent):
+            await writer.drain()
+            with open(part.path, "rb") as f:
+                await loop.sendfile(writer.transport, f, part.offset, part.length)
+        else:
+            writer.write(part)
+    await writer.drain()
+
+
+class AsyncHTTPServer:
+    """HTTP/1.1 сервер на asyncio.
+
+    Маршруты берутся из HTTPHandler.route. Синхронные обработчики
+    выполняются в пуле потоков, async def вызываются прямо в цикле
+    событий. Ожидающее keep-alive соединение или медленный клиент
+    занимают корутину, а не поток.
+
+    Внедрение Session и User для async-обработчиков происходит в цикле
+    событий, поэтому запросы к базе в них лучше выполнять через
+    run_in_executor.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int = SERVER_WORKERS,
+        backlog: int = SERVER_BACKLOG,
+        reuse_port: bool = SERVER_REUSE_PORT,
+        keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+        max_requests: int = KEEPALIVE_MAX_REQUESTS,
+    ):
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.reuse_port = reuse_port
+        self.keepalive_timeout = keepalive_timeout
+        self.max_requests = max_requests
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="async-worker")
+        self.server = None
+
+    async def start(self) -> asyncio.Server:
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port,
+            backlog=self.backlog, reuse_port=self.reuse_port or None,
+            limit=MAX_HEADER_SIZE,
+        )
+        return self.server
+
+    async def serve_forever(self):
+        server = await self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        try:
+            for number in range(1, self.max_requests + 1):
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except asyncio.LimitOverrunError:
+                    writer.write(encode_response(error_page(431), keep_alive=False))
+                    await writer.drain()
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                last = number == self.max_requests
+                if not await self.handle_request(head, reader, writer, peer, last):
+                    break
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+    async def handle_request(self, head: bytes, reader, writer, peer, last: bool) -> bool:
+        """Обрабатывает один запрос, возвращает True, если соединение остается открытым."""
+        request_line, _, header_bytes = head.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            writer.write(encode_response(error_page(400), keep_alive=False))
+            await writer.drain()
+            return False
+        if version not in ("HTTP/1.0", "HTTP/1.1"):
+            writer.write(encode_response(error_page(505), keep_alive=False))
+            await writer.drain()
+            return False
+
+        headers = BytesParser(_class=HTTPMessage).parsebytes(header_bytes)
+        connection = headers.get("Connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+        keep_alive = keep_alive and not last
+
+        if "chunked" in headers.get("Transfer-Encoding", "").lower():
+            writer.write(encode_response(error_page(411), keep_alive=False))
+            await writer.drain()
+            return False
+        try:
+            length = int(headers.get("Content-Length", 0))
+            if (
+                length and version == "HTTP/1.1"
+                and headers.get("Expect", "").lower() == "100-continue"
+            ):
+                # Как BaseHTTPRequestHandler.handle_expect_100: клиент ждет
+                # разрешения, прежде чем отправить тело
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            body = await asyncio.wait_for(reader.readexactly(length), self.keepalive_timeout) if length else b""
+        except ValueError:
+            writer.write(encode_response(error_page(400), keep_alive=False))
+            await writer.drain()
+            return False
+
+        parsed = urlparse(target)
+        handler = AsyncRequestHandler(method, parsed.path, parsed.query, headers, body)
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                response = await self.dispatch(handler)
+            except Exception as e:
+                # Как в многопоточном сервере: непредвиденная ошибка - 500,
+                # а не закрытое соединение
+                response = error_response(handler, "/", e)
+            response = negotiate_response(response, headers.get("Accept-Encoding"))
+            if response.streaming and version == "HTTP/1.1":
+                await write_stream(writer, response, keep_alive, self.executor)
+            else:
+                if response.streaming:
+                    # HTTP/1.0 не знает chunked: собираем тело целиком
+                    response.content = await loop.run_in_executor(self.executor, response.body)
+                await write_response(writer, response, keep_alive)
+        finally:
+            # Потоковое тело читает из базы до конца отдачи
+            if handler._session is not None:
+                await loop.run_in_executor(self.executor, handler.close_session)
+        logging.info(f'{peer[0]} "{request_line.decode("latin-1")}" {response.status}')
+        return keep_alive
+
+    async def dispatch(self, handler: AsyncRequestHandler) -> Response:
+        loop = asyncio.get_running_loop()
+        method, path = handler.command, handler.path
+        if method not in HTTPHandler.router.methods:
+            return error_page(501, f"Unsupported method ({method!r})")
+        if path.startswith(STATIC_URL):
+            if method != "GET":
+                return error_page(404)
+            response = await loop.run_in_executor(self.executor, static_response, path, handler.headers)
+            return response or error_page(404, "File not found")
+
+        route, handler.path_params = HTTPHandler.router.match(method, path)
+        if route is None:
+            return error_page(404, f"Page {path} not found" if method == "GET" else "Invalid URL")
+
+        if inspect.iscoroutinefunction(route.function):
+            # async-обработчики вызываются в цикле событий в обход
+            # синхронной цепочки промежуточных слоев
+            from back.kwargs import get_kwargs
+            try:
+                return await route.function(**get_kwargs(route.function, handler))
+            except Exception as e:
+                return error_response(handler, route.redirect, e)
+        return await loop.run_in_executor(self.executor, HTTPHandler.pipeline, handler, route)
@@ -0,0 +1,260 @@
+import gzip
+import logging
+import os
+
+from back.config import BUNDLES_ROOT, FRONTEND_ROOT
+
+# Бандл (путь внутри front/) -> исходные файлы в порядке выполнения.
+# Порядок повторяет прежний порядок тегов <script>: более поздний файл
+# по-прежнему переопределяет одноименные функции более раннего
+BUNDLES = {
+    # Синхронно в <head>, после jQuery, slick и AOS с CDN
+    "bundles/base.js": ["src/slick-carousel.js", "src/aos-init.js"],
+    # С defer в блоке scripts base.html
+    "bundles/common.js": ["src/form.js"],
+    # Подключаются на месте прежнего скрипта страницы и заменяют common.js:
+    # form.js содержит только объявления функций, поэтому его раннее
+    # выполнение ничего не меняет
+    "bundles/login.js": ["src/login.js", "src/form.js"],
+    "bundles/edit.js": ["src/edit.js", "src/form.js"],
+    "bundles/admin.js": ["src/admin.js", "src/form.js"],
+    "bundles/styles.css": ["static/css/styles.css"],
+}
+
+# Какие бандлы подключает каждая страница - только для отчета
+PAGES = {
+    "index.html": ["bundles/styles.css", "bundles/base.js", "bundles/common.js"],
+    "register.html": ["bundles/styles.css", "bundles/base.js", "bundles/common.js"],
+    "login.html": ["bundles/styles.css", "bundles/base.js", "bundles/login.js"],
+    "edit.html": ["bundles/styles.css", "bundles/base.js", "bundles/edit.js"],
+    "navbar.html": ["bundles/styles.css", "bundles/base.js", "bundles/edit.js"],
+    "delete_confirm.html": ["bundles/styles.css", "bundles/base.js", "bundles/common.js"],
+    "admin_login.html": ["bundles/styles.css", "bundles/base.js", "bundles/common.js"],
+    "admin_dashboard.html": ["bundles/styles.css", "bundles/base.js", "bundles/admin.js"],
+}
+
+# После этих символов и слов "/" начинает регулярное выражение, а не деление
+REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char in "_$"
+
+
+def _skip_string(source: str, start: int) -> int:
+    """Индекс за закрывающей кавычкой строки, начинающейся в start."""
+    quote = source[start]
+    index = start + 1
+    while index < len(source):
+        char = source[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == quote:
+            return index + 1
+        if char == "\n" and quote != "`":
+            raise ValueError(f"Unterminated string at {start}")
+        index += 1
+    raise ValueError(f"Unterminated string at {start}")
+
+
+def _skip_regex(source: str, start: int) -> int:
+    index = start + 1
+    in_class = False
+    while index < len(source):
+        char = source[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "\n":
+            raise ValueError(f"Unterminated regular expression at {start}")
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            index += 1
+            while index < len(source) and _is_word(source[index]):
+                index += 1
+            return index
+        index += 1
+    raise ValueError(f"Unterminated regular expression at {start}")
+
+
+def minify_js(source: str) -> str:
+    """Консервативная минификация JavaScript.
+
+    Удаляются комментарии, отступы, пустые строки и лишние пробелы
+    внутри строки. Переводы строк сохраняются, чтобы не зависеть от
+    автоматической расстановки точек с запятой. Строки, шаблонные строки
+    и регулярные выражения не изменяются.
+    """
+    parts: list[str] = []
+    pending = ""  # "", " " или "\n" - пропущенные пробельные символы
+    index = 0
+    length = len(source)
+
+    def emit(token: str):
+        nonlocal pending
+        if pending and parts:
+            previous = parts[-1][-1]
+            if pending == "\n":
+                parts.append("\n")
+            elif (_is_word(previous) and _is_word(token[0])) or (previous in "+-" and token[0] in "+-"):
+                parts.append(" ")
+        pending = ""
+        parts.append(token)
+
+    while index < length:
+        char = source[index]
+        if char in " \t\r\n":
+            if char == "\n":
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            index += 1
+        elif source.startswith("//", index):
+            end = source.find("\n", index)
+            index = length if end == -1 else end
+        elif source.startswith("/*", index):
+            end = source.find("*/", index + 2)
+            if end == -1:
+                raise ValueError(f"Unterminated comment at {index}")
+            if "\n" in source[index:end]:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            index = end + 2
+        elif char in "'\"`":
+            end = _skip_string(source, index)
+            emit(source[index:end])
+            index = end
+        elif char == "/" and (
+            not parts or parts[-1][-1] in REGEX_PREFIX or parts[-1] in REGEX_KEYWORDS
+        ):
+            end = _skip_regex(source, index)
+            emit(source[index:end])
+            index = end
+        else:
+            end = index + 1
+            if _is_word(char):
+                while end < length and _is_word(source[end]):
+                    end += 1
+            emit(source[index:end])
+            index = end
+    return "".join(parts) + "\n"
+
+
+def minify_css(source: str) -> str:
+    """Консервативная минификация CSS: комментарии, пробелы вокруг
+    { } ; , и после ":", последняя ";" в блоке. Пробел перед ":" не
+    трогаем - в селекторе "a :hover" он значим."""
+    parts: list[str] = []
+    pending = False
+    index = 0
+    length = len(source)
+    while index < length:
+        char = source[index]
+        if char in " \t\r\n\f":
+            pending = True
+            index += 1
+        elif source.startswith("/*", index):
+            end = source.find("*/", index + 2)
+            if end == -1:
+                raise ValueError(f"Unterminated comment at {index}")
+            pending = True
+            index = end + 2
+        elif char in "'\"":
+            end = _skip_string(source, index)
+            if pending and parts and parts[-1][-1] not in "{};,:":
+                parts.append(" ")
+            pending = False
+            parts.append(source[index:end])
+            index = end
+        else:
+            if char in "{};,":
+                pending = False
+            if char == "}" and parts and parts[-1] == ";":
+                parts.pop()
+            if pending and parts and parts[-1][-1] not in "{};,:":
+                parts.append(" ")
+            pending = False
+            parts.append(char)
+            index += 1
+    return "".join(parts) + "\n"
+
+
+def minify(path: str, source: str) -> str:
+    if path.endswith(".js"):
+        return minify_js(source)
+    if path.endswith(".css"):
+        return minify_css(source)
+    return source
+
+
+def build_bundles(root: str = FRONTEND_ROOT, output: str = BUNDLES_ROOT) -> dict[str, bytes]:
+    """Собирает и минифицирует бандлы из BUNDLES, возвращает их содержимое."""
+    result = {}
+    for name, sources in BUNDLES.items():
+        chunks = []
+        for source in sources:
+            with open(os.path.join(root, source), encoding="utf-8") as f:
+                chunks.append(minify(source, f.read()))
+        # ";" страхует от склейки выражений на стыке файлов
+        separator = ";\n" if name.endswith(".js") else ""
+        content = separator.join(chunks).encode("utf-8")
+        target = os.path.join(output, os.path.relpath(name, "bundles"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        current = None
+        if os.path.exists(target):
+            with open(target, "rb") as f:
+                current = f.read()
+        # Неизмененный бандл не перезаписываем, чтобы не сбивать mtime
+        if current != content:
+            temporary = f"{target}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(content)
+            os.replace(temporary, target)
+        result[name] = content
+    return result
+
+
+def report(bundles: dict[str, bytes], root: str = FRONTEND_ROOT) -> list[dict]:
+    """Размер и число запросов к локальной статике для каждой страницы
+    до и после сборки. Размеры - в байтах, без сжатия и с gzip."""
+    rows = []
+    for page, names in PAGES.items():
+        sources = list(dict.fromkeys(source for name in names for source in BUNDLES[name]))
+        before = after = before_gzip = after_gzip = 0
+        for source in sources:
+            with open(os.path.join(root, source), "rb") as f:
+                data = f.read()
+            before += len(data)
+            before_gzip += len(gzip.compress(data, mtime=0))
+        for name in names:
+            after += len(bundles[name])
+            after_gzip += len(gzip.compress(bundles[name], mtime=0))
+        rows.append({
+            "page": page,
+            "requests_before": len(sources),
+            "requests_after": len(names),
+            "bytes_before": before,
+            "bytes_after": after,
+            "gzip_before": before_gzip,
+            "gzip_after": after_gzip,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    rows = report(build_bundles())
+    logging.info(f"{'страница':<22}{'запросы':>10}{'байты':>18}{'gzip':>16}")
+    for row in rows:
+        logging.info(
+            f"{row['page']:<22}"
+            f"{row['requests_before']:>5} -> {row['requests_after']:<2}"
+            f"{row['bytes_before']:>8} -> {row['bytes_after']:<6}"
+            f"{row['gzip_before']:>7} -> {row['gzip_after']:<6}"
+        )
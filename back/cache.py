@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from http.cookies import CookieError, SimpleCookie
+from typing import Any
+from urllib.parse import parse_qs
+
+from back.custom_types import Response
+
+
+class LRUCache:
+    """LRU-кеш с ограничением суммарного размера значений в байтах.
+
+    Значение больше всего бюджета не кешируется. Счетчики hits/misses
+    нужны для подбора бюджета.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old)
+            self._data[key] = value
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Параметры кеширования ответа маршрута.
+
+    В ключ входят только перечисленные параметры строки запроса и куки -
+    те, от которых зависит ответ. Остальные на выбор записи не влияют.
+    """
+    ttl: float
+    query: tuple[str, ...] = ()
+    cookies: tuple[str, ...] = ()
+
+    def key(self, method: str, path: str, query: str, cookie_header: str) -> tuple:
+        params = parse_qs(query) if self.query and query else {}
+        cookie = SimpleCookie()
+        if self.cookies and cookie_header:
+            try:
+                cookie.load(cookie_header)
+            except CookieError:
+                pass
+        return (
+            method,
+            path,
+            tuple(tuple(params.get(name, ())) for name in self.query),
+            tuple(cookie[name].value if name in cookie else None for name in self.cookies),
+        )
+
+
+class ResponseCache(LRUCache):
+    """Кеш готовых ответов с TTL поверх LRUCache.
+
+    Хранится копия статуса, заголовков и тела, поэтому изменение
+    выданного Response не портит запись. Ответы, устанавливающие куки,
+    и ответы не из байтов/строки не кешируются.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes, sizeof=lambda entry: len(entry[3]))
+        # Найденные, но устаревшие записи; они учтены и в hits
+        self.expired = 0
+
+    def get_response(self, key: Hashable) -> Response | None:
+        entry = self.get(key)
+        if entry is None:
+            return None
+        expires, status, headers, content = entry
+        if expires <= time.monotonic():
+            self.expired += 1
+            self.delete(key)
+            return None
+        return Response(status, dict(headers), SimpleCookie(), content, shared=True)
+
+    @staticmethod
+    def cacheable(response: Response) -> bool:
+        return (
+            response.status == 200
+            and not response.cookie
+            and isinstance(response.content, (str, bytes))
+        )
+
+    def set_response(self, key: Hashable, response: Response, ttl: float) -> bool:
+        if not self.cacheable(response):
+            return False
+        content = response.content
+        if isinstance(content, str):
+            content = content.encode()
+        self.set(key, (time.monotonic() + ttl, response.status, dict(response.headers), content))
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "expired": self.expired}
+
+
+class TokenCache(LRUCache):
+    """Результаты проверки токенов: ключ -> (истекает, id владельца или None).
+
+    Бюджет задается в записях, а не в байтах. Отрицательный результат
+    (токен не найден или неактивен) тоже кешируется, чтобы перебор
+    случайных токенов не доходил до базы.
+
+    Отзыв токенов в других процессах узнается по номеру версии в базе:
+    его опрашивают не чаще poll_interval секунд, и при изменении кеш
+    очищается целиком. generation меняется при каждой очистке и удалении,
+    чтобы результат запроса, начатого до отзыва, не попал в кеш после него.
+    """
+
+    def __init__(self, max_entries: int, poll_interval: float):
+        super().__init__(max_entries, sizeof=lambda entry: 1)
+        self.poll_interval = poll_interval
+        self.version: int | None = None
+        self.generation = 0
+        self.invalidations = 0
+        self._next_poll = 0.0
+
+    def poll_due(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_poll:
+                return False
+            self._next_poll = now + self.poll_interval
+            return True
+
+    def sync(self, version: int):
+        if version == self.version:
+            return
+        if self.version is not None:
+            self.invalidate()
+        self.version = version
+
+    def invalidate(self, *keys: Hashable):
+        """Удаляет указанные записи или, без аргументов, все."""
+        self.generation += 1
+        if not keys:
+            self.invalidations += 1
+            self.clear()
+        for key in keys:
+            self.delete(key)
+
+    def lookup(self, key: Hashable) -> tuple[bool, int | None]:
+        entry = self.get(key)
+        if entry is None:
+            return False, None
+        expires, subject = entry
+        if expires <= time.monotonic():
+            self.delete(key)
+            return False, None
+        return True, subject
+
+    def remember(self, key: Hashable, subject: int | None, ttl: float, generation: int):
+        if ttl > 0 and generation == self.generation:
+            self.set(key, (time.monotonic() + ttl, subject))
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "version": self.version, "invalidations": self.invalidations}
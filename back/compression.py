@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import sys
+import zlib
+from collections.abc import Iterable, Iterator
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from back.cache import LRUCache
+from back.config import (
+    COMPRESSIBLE_TYPES, FRONTEND_ROOT, RESPONSE_COMPRESS, RESPONSE_COMPRESS_CACHE_BYTES,
+    RESPONSE_COMPRESS_LEVEL, RESPONSE_COMPRESS_MIN_SIZE, STREAM_CHUNK_SIZE,
+)
+from back.custom_types import FileContent, Response, stream_chunks
+
+# Кодировки в порядке предпочтения сервера и расширения их файлов
+EXTENSIONS = {"br": ".br", "gzip": ".gz"} if brotli else {"gzip": ".gz"}
+ENCODINGS = tuple(EXTENSIONS)
+# Кодировки для сжатия ответов на лету: только zlib, без лишних зависимостей
+DYNAMIC_ENCODINGS = ("gzip", "deflate")
+# zlib.compressobj: wbits для gzip-обертки и для zlib-формата (deflate в HTTP)
+WBITS = {"gzip": 31, "deflate": 15}
+
+# Сжатые варианты разделяемых тел: (кодировка, sha256 тела) -> байты.
+# В ключе дайджест, а не само тело, чтобы бюджет учитывал всю память записи
+RESPONSE_VARIANTS = LRUCache(RESPONSE_COMPRESS_CACHE_BYTES)
+
+
+def compressible(mimetype: str | None) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def negotiate(header: str | None, available: tuple[str, ...] = ENCODINGS) -> str | None:
+    """Выбирает кодировку из available по Accept-Encoding клиента."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str, level: int = 9) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level + 2, 11))
+    if encoding == "gzip":
+        # mtime=0: одинаковые файлы дают одинаковые байты
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(data, level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int) -> Iterator[bytes]:
+    """Сжимает поток блоками. После каждого блока выполняется
+    Z_SYNC_FLUSH, чтобы клиент мог распаковать и показать уже
+    полученную часть, не дожидаясь конца ответа."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _media_type(response: Response) -> str:
+    return response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def negotiate_response(response: Response, accept_encoding: str | None) -> Response:
+    """Готовит ответ обработчика к отправке: склеивает мелкие части
+    потокового тела и сжимает тело, если клиент это принимает.
+
+    Не трогает ответы, которые уже выбрали представление сами (есть
+    Content-Encoding или Vary: Accept-Encoding, как у статики), ответы
+    без тела, 206 и тела с FileContent. Ответ из кеша ответов хранится
+    несжатым, а его сжатые варианты - в RESPONSE_VARIANTS.
+    """
+    if response.streaming:
+        response.content = stream_chunks(response.content, STREAM_CHUNK_SIZE)
+    if (
+        not RESPONSE_COMPRESS
+        or response.status < 200
+        or response.status in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or "accept-encoding" in response.headers.get("Vary", "").lower()
+        or not compressible(_media_type(response))
+    ):
+        return response
+
+    if response.streaming:
+        parts = None
+    else:
+        parts = response.body()
+        if any(isinstance(part, FileContent) for part in parts):
+            return response
+
+    # Ответ зависит от Accept-Encoding, даже если сейчас не сжат
+    vary = response.headers.get("Vary")
+    response.headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    encoding = negotiate(accept_encoding, DYNAMIC_ENCODINGS)
+    if encoding is None:
+        return response
+
+    if parts is None:
+        response.content = compress_stream(response.content, encoding, RESPONSE_COMPRESS_LEVEL)
+    else:
+        data = parts[0] if len(parts) == 1 else b"".join(parts)
+        if len(data) < RESPONSE_COMPRESS_MIN_SIZE:
+            return response
+        key = (encoding, hashlib.sha256(data).digest()) if response.shared else None
+        compressed = RESPONSE_VARIANTS.get(key) if key else None
+        if compressed is None:
+            compressed = compress(data, encoding, RESPONSE_COMPRESS_LEVEL)
+            if key:
+                RESPONSE_VARIANTS.set(key, compressed)
+        if len(compressed) >= len(data):
+            return response
+        response.content = compressed
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def precompress(root: str = FRONTEND_ROOT) -> int:
+    """Создает .gz (и .br, если доступен brotli) рядом с текстовыми файлами.
+
+    Уже существующие и не устаревшие файлы пропускаются. Если сжатие не
+    дает выигрыша, файл не создается. Возвращает число записанных файлов.
+    """
+    written = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(directory, name)
+            if not compressible(mimetypes.guess_type(path)[0]):
+                continue
+            source_mtime = os.stat(path).st_mtime_ns
+            data = None
+            for encoding, extension in EXTENSIONS.items():
+                target = path + extension
+                if os.path.exists(target) and os.stat(target).st_mtime_ns >= source_mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                compressed = compress(data, encoding)
+                if len(compressed) >= len(data):
+                    continue
+                temporary = f"{target}.{os.getpid()}.tmp"
+                with open(temporary, "wb") as f:
+                    f.write(compressed)
+                os.replace(temporary, target)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    count = precompress(sys.argv[1] if len(sys.argv) > 1 else FRONTEND_ROOT)
+    logging.info(f"Сжато файлов: {count}")
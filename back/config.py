@@ -1,24 +1,159 @@
+import json
 import os
 import string
+import tempfile
 
 from email.utils import formatdate
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from sqlmodel import create_engine
 from dotenv import load_dotenv 
 
+from back.pool import TimedQueuePool
+
 
 load_dotenv()
 
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
 
+# Режим сервера: "single" - однопоточный HTTPServer, "threaded" - пул потоков,
+# "prefork" - несколько процессов, в каждом из которых пул потоков,
+# "asyncio" - один цикл событий, синхронные обработчики в пуле потоков
+SERVER_MODE = os.getenv("SERVER_MODE", "threaded")
+# Количество рабочих потоков в пуле
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 16))
+# Глубина очереди принятых соединений, ожидающих свободный поток
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", 64))
+# Размер backlog для listen()
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 128))
+# Количество рабочих процессов в режиме prefork
+SERVER_PROCESSES = int(os.getenv("SERVER_PROCESSES", os.cpu_count() or 1))
+# SO_REUSEPORT: каждый процесс открывает свой сокет, ядро распределяет соединения
+SERVER_REUSE_PORT = os.getenv("SERVER_REUSE_PORT", "0") == "1"
+
+# Постоянные соединения: время ожидания следующего запроса (сек)
+# и максимальное количество запросов в одном соединении
+KEEPALIVE_TIMEOUT = float(os.getenv("KEEPALIVE_TIMEOUT", 15))
+KEEPALIVE_MAX_REQUESTS = int(os.getenv("KEEPALIVE_MAX_REQUESTS", 100))
+
 DEFAULT_URL = "/"
 STATIC_URL = "/front/"
+FRONTEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "front"))
+# Как долго (сек) доверять закешированному stat() статического файла
+STATIC_STAT_TTL = float(os.getenv("STATIC_STAT_TTL", 2))
+# Cache-Control для каталогов внутри front/; выбирается самый длинный
+# совпавший префикс. Переопределяется JSON-объектом в STATIC_CACHE_CONTROL
+STATIC_CACHE_CONTROL = {
+    # Имена файлов в dist/ содержат хеш содержимого и никогда не меняются
+    "dist/": "public, max-age=31536000, immutable",
+    "dist/manifest.json": "no-cache",
+    "img/": "public, max-age=604800",
+    "video/": "public, max-age=604800",
+    "src/": "public, max-age=0, must-revalidate",
+    "static/": "public, max-age=0, must-revalidate",
+    "bundles/": "public, max-age=0, must-revalidate",
+    **json.loads(os.getenv("STATIC_CACHE_CONTROL", "{}")),
+}
+STATIC_CACHE_CONTROL_DEFAULT = os.getenv("STATIC_CACHE_CONTROL_DEFAULT", "no-cache")
+
+# Сжатие: типы содержимого, которые имеет смысл сжимать (префиксы)
+COMPRESSIBLE_TYPES = tuple(os.getenv(
+    "COMPRESSIBLE_TYPES",
+    "text/,application/javascript,application/json,image/svg+xml",
+).split(","))
+# Создавать .gz/.br рядом со статическими файлами при запуске
+STATIC_PRECOMPRESS = os.getenv("STATIC_PRECOMPRESS", "1") == "1"
+# Бюджет памяти на сжатые на лету статические файлы, у которых нет .gz/.br
+STATIC_COMPRESS_CACHE_BYTES = int(os.getenv("STATIC_COMPRESS_CACHE_BYTES", 8 * 1024 * 1024))
+# Файлы больше этого размера на лету не сжимаются
+STATIC_COMPRESS_MAX_SIZE = int(os.getenv("STATIC_COMPRESS_MAX_SIZE", 1024 * 1024))
+
+# Сборка статики с хешем содержимого в имени файла (python -m back.assets)
+ASSETS_ROOT = os.path.join(FRONTEND_ROOT, "dist")
+ASSETS_MANIFEST = os.path.join(ASSETS_ROOT, "manifest.json")
+# Склеенные и минифицированные JS/CSS (python -m back.bundler)
+BUNDLES_ROOT = os.path.join(FRONTEND_ROOT, "bundles")
+# Собирать статику при запуске сервера
+ASSETS_BUILD = os.getenv("ASSETS_BUILD", "1") == "1"
+
+# Кеш содержимого небольших статических файлов в памяти процесса
+STATIC_MEMORY_CACHE_BYTES = int(os.getenv("STATIC_MEMORY_CACHE_BYTES", 32 * 1024 * 1024))
+# Файлы больше этого размера всегда отдаются с диска через sendfile
+STATIC_MEMORY_MAX_FILE_SIZE = int(os.getenv("STATIC_MEMORY_MAX_FILE_SIZE", 256 * 1024))
+
+# Размер блока при потоковой отдаче ответа (Transfer-Encoding: chunked)
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 16 * 1024))
+
+# Сжатие ответов обработчиков (HTML, JSON) по Accept-Encoding
+RESPONSE_COMPRESS = os.getenv("RESPONSE_COMPRESS", "1") == "1"
+RESPONSE_COMPRESS_LEVEL = int(os.getenv("RESPONSE_COMPRESS_LEVEL", 6))
+# Ответы меньше этого размера не сжимаются: выигрыш меньше накладных расходов
+RESPONSE_COMPRESS_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", 1024))
+# Бюджет памяти на сжатые варианты ответов из кеша ответов
+RESPONSE_COMPRESS_CACHE_BYTES = int(os.getenv("RESPONSE_COMPRESS_CACHE_BYTES", 4 * 1024 * 1024))
+
+# Заголовок Server-Timing и предупреждение о запросах дольше SLOW_REQUEST_MS
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+
+# Кеш готовых ответов для маршрутов, объявленных с cache=CachePolicy(...)
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", 16 * 1024 * 1024))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 60))
+
+# Кеш результатов проверки токенов пользователей и администраторов.
+# TOKEN_CACHE_TTL=0 отключает кеш; запись никогда не живет дольше токена
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 60))
+# Сколько помнить, что токен не найден или неактивен
+TOKEN_CACHE_NEGATIVE_TTL = float(os.getenv("TOKEN_CACHE_NEGATIVE_TTL", 10))
+# Как часто процесс проверяет версию отзыва токенов в базе (секунды)
+TOKEN_REVOCATION_POLL = float(os.getenv("TOKEN_REVOCATION_POLL", 1))
+
+# Интервал фоновой очистки просроченных токенов (секунды). Срок
+# действия проверяется при чтении, очистка только освобождает место
+TOKEN_CLEANUP_INTERVAL = int(os.getenv("TOKEN_CLEANUP_INTERVAL", 600))
+# Интервал удаления старых неактивных токенов (секунды)
+TOKEN_PURGE_INTERVAL = int(os.getenv("TOKEN_PURGE_INTERVAL", 3600))
+# Фоновые задачи (back/scheduler.py) в процессах сервера
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+# Сколько строк токенов обновлять или удалять за одну транзакцию очистки
+TOKEN_CLEANUP_BATCH = int(os.getenv("TOKEN_CLEANUP_BATCH", 1000))
+
+# Хеширование паролей (back/passwords.py). Изменение числа итераций
+# применяется к старым хешам при следующем входе пользователя
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", 100000))
+# Процессов в пуле хеширования на каждый процесс сервера; 0 - считать в
+# потоке запроса
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Сколько задач может ждать свободный процесс и сколько секунд ждать
+# места в очереди, прежде чем ответить 503
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))
+
+# Токен для служебных маршрутов /internal/* (заголовок X-Internal-Token).
+# Если не задан, служебные маршруты отвечают 404
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "")
+
+# Режим работы: в "production" шаблоны не перечитываются с диска при
+# изменении, а скомпилированный байткод сохраняется между запусками
+APP_ENV = os.getenv("APP_ENV", "production")
+PRODUCTION = APP_ENV == "production"
+
+TEMPLATES_ROOT = os.path.join(os.path.dirname(__file__), "templates")
+# Каталог кеша байткода шаблонов; пустая строка отключает кеш
+TEMPLATE_CACHE_DIR = os.getenv(
+    "TEMPLATE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "sportscool-templates") if PRODUCTION else "",
+)
+if TEMPLATE_CACHE_DIR:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
 
 # Настройки шаблонизатора
 TEMPLATE_ENVIRONMENT = Environment(
-    loader=FileSystemLoader("back/templates"),
+    loader=FileSystemLoader(TEMPLATES_ROOT),
     autoescape=True,
+    auto_reload=not PRODUCTION,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR) if TEMPLATE_CACHE_DIR else None,
 )
 
 DB_CONFIG = {
@@ -38,7 +173,30 @@ if not DB_CONFIG['user'] or not DB_CONFIG['password'] or not DB_CONFIG['database
 
 DATABASE_URL = f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Пул соединений. В prefork у каждого процесса свой пул, поэтому нужно
+# max_connections MySQL >= SERVER_PROCESSES * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Сколько секунд ждать свободное соединение, прежде чем выдать ошибку
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Пересоздавать соединения старше N секунд (меньше wait_timeout MySQL)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))
+# Проверять соединение перед выдачей из пула
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_ECHO = os.getenv("DB_ECHO", "1") == "1"
+# Применять миграции схемы (back/migrations.py) при запуске сервера
+DB_MIGRATE = os.getenv("DB_MIGRATE", "1") == "1"
+
+engine = create_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 
 EPOCH = formatdate(0, usegmt=True)
 ALPHABET = string.ascii_letters + string.digits
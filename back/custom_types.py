@@ -1,9 +1,13 @@
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass, field
 from http.cookies import SimpleCookie
-from typing import TypeAlias
+from typing import TYPE_CHECKING, Any, TypeAlias
 
 from back.models import User
 
+if TYPE_CHECKING:
+    from back.cache import CachePolicy
+
 UserNoneType: TypeAlias = User | None
 
 
@@ -15,11 +19,71 @@ class Request:
     path: str
     query: str
     body: bytes
-    params: dict[str, str] = field(default_factory=dict)
+    params: dict[str, Any] = field(default_factory=dict)
+
+@dataclass(frozen=True)
+class Route:
+    """Маршрут, зарегистрированный через HTTPHandler.route."""
+    function: Callable
+    redirect: str
+    cache: "CachePolicy | None" = None
+
+@dataclass
+class FileContent:
+    """Часть файла, которую сервер отправляет через sendfile без копирования."""
+    path: str
+    offset: int
+    length: int
 
 @dataclass
 class Response:
     status: int
     headers: dict[str, str]
     cookie: SimpleCookie
-    content: str
\ No newline at end of file
+    content: str | bytes | FileContent | list[bytes | FileContent] | Iterator[str | bytes]
+    # Тело разделяется между запросами (выдано кешем ответов), поэтому
+    # его сжатый вариант имеет смысл сохранить
+    shared: bool = False
+
+    @property
+    def streaming(self) -> bool:
+        """Тело - итератор (например, Template.stream()), длина которого
+        заранее неизвестна; отдается с Transfer-Encoding: chunked."""
+        return isinstance(self.content, Iterator)
+
+    def body(self) -> list[bytes | FileContent]:
+        """Тело ответа как список частей: байты и фрагменты файлов.
+
+        Потоковое тело при этом читается целиком.
+        """
+        content = self.content
+        if not content:
+            return []
+        if isinstance(content, str):
+            return [content.encode()]
+        if isinstance(content, (bytes, FileContent)):
+            return [content]
+        return [part.encode() if isinstance(part, str) else part for part in content]
+
+
+def body_length(parts: list[bytes | FileContent]) -> int:
+    return sum(part.length if isinstance(part, FileContent) else len(part) for part in parts)
+
+
+def stream_chunks(content: Iterable[str | bytes], size: int) -> Iterator[bytes]:
+    """Склеивает мелкие части потокового тела в блоки не меньше size байт."""
+    buffer = []
+    buffered = 0
+    for part in content:
+        if isinstance(part, str):
+            part = part.encode()
+        if not part:
+            continue
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
@@ -1,17 +1,12 @@
 import time
-import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import text
+
+from back.config import DB_CONFIG, engine
 
 def wait_for_db(max_retries=30, retry_interval=2):
-    
-    username = os.environ.get('DB_USERNAME')
-    password = os.environ.get('DB_PASSWORD')
-    database = os.environ.get('DB_NAME')
-    host = os.environ.get('MYSQL_HOST', 'db')
-    
-    conn_str = f"mysql+pymysql://{username}:{password}@{host}/{database}"
-    engine = create_engine(conn_str)
+    """Ждет готовности базы, проверяя ее через основной engine приложения."""
+    host = DB_CONFIG['host']
+    database = DB_CONFIG['database']
     
     retry_count = 0
     connected = False
@@ -34,4 +29,4 @@ def wait_for_db(max_retries=30, retry_interval=2):
     if not connected:
         raise Exception(f"Не удалось подключиться к базе данных после {max_retries} попыток. Последняя ошибка: {last_error}")
     
-    return engine
\ No newline at end of file
+    return engine
@@ -1,10 +1,13 @@
+import asyncio
+import inspect
 from datetime import datetime, timedelta
 from email.utils import formatdate
 import os
 import json
 import logging
 import re
-from sqlmodel import select
+import secrets
+from sqlmodel import func, select
 from urllib.parse import unquote, urlparse
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -18,21 +21,99 @@ from pydantic import ValidationError
 from sqlmodel import Session
 
 from back.config import (
-    engine, TEMPLATE_ENVIRONMENT, STATIC_URL, DEFAULT_URL,
-    APPLICATION_JSON, APPLICATION_URLENCODED,
+    engine, TEMPLATE_ENVIRONMENT, STATIC_URL, DEFAULT_URL, INTERNAL_TOKEN,
+    APPLICATION_JSON, APPLICATION_URLENCODED, KEEPALIVE_MAX_REQUESTS,
+    KEEPALIVE_TIMEOUT, RESPONSE_CACHE_BYTES, RESPONSE_CACHE_TTL, SERVER_TIMING,
+    SLOW_REQUEST_MS,
 )
+from back.assets import asset
+from back.cache import CachePolicy, ResponseCache
 from back.models import Admin, AdminToken, User, RegistrationForm
-from back.custom_types import Request, Response
-from back.utils import BadUserError, UserIsNotAuthenticated, check_admin_token, check_token, clear_cookie, generate_admin_token, generate_login, generate_password, generate_token
+from back.compression import negotiate_response
+from back.custom_types import FileContent, Request, Response, Route, body_length
+from back.middleware import ResponseCacheMiddleware, TimingMiddleware, compose
+from back.passwords import PasswordHasherBusy
+from back.router import Router
+from back.scheduler import SCHEDULER
+from back.static import ASSET_CACHE, COMPRESSED_CACHE, static_response
+from back.utils import BadUserError, UserIsNotAuthenticated, check_admin_token, check_token, clear_cookie, generate_admin_token, generate_login, generate_password, generate_token, revoke_tokens, TOKEN_CACHE
 from back.validators import RegistrationFormModel
 
-FRONTEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "front"))
+# {{ asset('src/form.js') }} в шаблонах дает адрес копии с хешем в имени
+TEMPLATE_ENVIRONMENT.globals["asset"] = asset
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_BYTES)
+
+
+def error_response(handler, redirect: str, e: Exception) -> Response:
+    # Вызывается из блока except: logging.exception подхватит трассировку
+    from back.kwargs import validation_error_response
+    if isinstance(e, ValidationError):
+        return validation_error_response(handler, redirect, e)
+    if isinstance(e, PasswordHasherBusy):
+        logging.warning(f"Очередь хеширования паролей заполнена: {handler.command} {handler.path}")
+        return Response(
+            status=503,
+            cookie=SimpleCookie(),
+            headers={"Content-Type": "text/plain", "Retry-After": "1"},
+            content=str(e),
+        )
+    logging.exception('Internal server error')
+    content_type = handler.headers.get("Content-Type", "")
+    if APPLICATION_JSON in content_type:
+        return Response(
+            status=400,
+            cookie=SimpleCookie(),
+            headers={"Content-Type": "application/json"},
+            content=json.dumps({"form": str(e)}),
+        )
+    return Response(
+        status=500,
+        cookie=SimpleCookie(),
+        headers={"Content-Type": "text/plain"},
+        content="Internal Server Error",
+    )
+
+
+def call_route(handler, function: Callable, redirect: str) -> Response:
+    from back.kwargs import get_kwargs
+    try:
+        kwargs = get_kwargs(function, handler)
+        response = function(**kwargs)
+        if inspect.isawaitable(response):
+            # async-обработчик в синхронном сервере
+            response = asyncio.run(response)
+    except Exception as e:
+        response = error_response(handler, redirect, e)
+    return response
+
+
+def dispatch_route(handler, route: Route) -> Response:
+    """Последнее звено цепочки промежуточных слоев - вызов обработчика."""
+    return call_route(handler, route.function, route.redirect)
+
 
 class HTTPHandler(BaseHTTPRequestHandler):
-    paths = {"GET": {}, "POST": {}, "PUT": {}, "DELETE": {}}
-    dynamic_paths = {"GET": {}, "POST": {}, "PUT": {}, "DELETE": {}} 
+    router = Router()
+    # Промежуточные слои и собранная из них цепочка (см. use)
+    middleware: list = []
+    pipeline = staticmethod(dispatch_route)
+
+    # Постоянные соединения: Content-Length в каждом ответе, таймаут
+    # простоя на сокете и ограничение числа запросов на соединение
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    max_requests = KEEPALIVE_MAX_REQUESTS
+    # Заголовки и тело пишутся отдельными send(), без TCP_NODELAY
+    # Nagle задерживает тело ответа на keep-alive соединении
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        self.requests_handled = 0
+        super().handle()
 
     def parse_request(self) -> bool:
+        self.requests_handled += 1
         result = super().parse_request()
         parse = urlparse(self.path)
         self.original_path = parse.path  # Сохраняем оригинальный путь
@@ -41,9 +122,22 @@ class HTTPHandler(BaseHTTPRequestHandler):
         self.path_params = {}  # параметры из пути
         return result
 
-    def __init__(self, *args, **kwargs):
-        with Session(engine) as self.session:
-            super().__init__(*args, **kwargs)
+    _session = None
+
+    @property
+    def session(self) -> Session:
+        """Сессия создается при первом обращении - когда get_kwargs
+        внедряет Session или пользователя - и закрывается сразу после
+        отправки ответа. Статика и анонимные страницы соединение из
+        пула не берут."""
+        if self._session is None:
+            self._session = Session(engine)
+        return self._session
+
+    def close_session(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
     def req(self) -> Request:
         headers = dict(self.headers)
@@ -61,182 +155,138 @@ class HTTPHandler(BaseHTTPRequestHandler):
             params=self.path_params  # параметры пути
         )
 
-    def resp(self, response: Response):
+    def send_head(self, response: Response):
         self.send_response(response.status)
         for name, value in response.headers.items():
             self.send_header(name, value)
         for name in response.cookie:
             response.cookie[name]["path"] = DEFAULT_URL
             self.send_header("Set-Cookie", response.cookie[name].OutputString())
-        self.end_headers()
-        if response.content:
-            if isinstance(response.content, bytes):
-                self.wfile.write(response.content)
-            else:
-                self.wfile.write(response.content.encode())
 
-    def find_dynamic_handler(self, method):
-        #Находит обработчик для динамического пути
-        for pattern, handler in self.dynamic_paths[method].items():
-            path_parts = self.path.split('/')
-            pattern_parts = pattern.split('/')
-            
-            if len(path_parts) != len(pattern_parts):
-                continue
-                
-            match = True
-            params = {}
-            
-            for i, (path_part, pattern_part) in enumerate(zip(path_parts, pattern_parts)):
-                if pattern_part.startswith('{') and pattern_part.endswith('}'):
-                    # Это параметр
-                    param_name = pattern_part[1:-1]
-                    params[param_name] = path_part
-                elif path_part != pattern_part:
-                    match = False
-                    break
-                    
-            if match:
-                self.path_params = params
-                return handler
-                
-        return None
-
-    def do_GET(self):
-        if self.path.startswith("/front/"):
-            self.serve_static()
+    def resp(self, response: Response):
+        response = negotiate_response(response, self.headers.get("Accept-Encoding"))
+        if response.streaming:
+            self.resp_stream(response)
             return
-        try:
-            # Сначала проверяем статические маршруты
-            if self.path in self.paths["GET"]:
-                self.paths["GET"][self.path](self)
+        parts = response.body()
+        self.send_head(response)
+        if response.status not in (204, 304):
+            self.send_header("Content-Length", str(body_length(parts)))
+        self.send_connection_header()
+        self.end_headers()
+        for part in parts:
+            if isinstance(part, FileContent):
+                with open(part.path, "rb") as f:
+                    self.connection.sendfile(f, part.offset, part.length)
             else:
-                # Затем проверяем динамические маршруты
-                handler = self.find_dynamic_handler("GET")
-                if handler:
-                    handler(self)
-                else:
-                    self.send_error(404, explain=f"Page {self.path} not found")
-        except Exception as e:
-            logging.error(str(e))
-            self.send_error(500)
-
-    def do_POST(self):
-        if self.path.startswith("/front/"):
-            self.send_error(404)
-            return
+                self.wfile.write(part)
+
+    def resp_stream(self, response: Response):
+        chunked = self.request_version == "HTTP/1.1"
+        if not chunked:
+            # HTTP/1.0 не знает chunked: конец тела - закрытие соединения
+            self.close_connection = True
+        self.send_head(response)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_connection_header()
+        self.end_headers()
         try:
-            if self.path in self.paths["POST"]:
-                self.paths["POST"][self.path](self)
-            else:
-                handler = self.find_dynamic_handler("POST")
-                if handler:
-                    handler(self)
-                else:
-                    self.send_error(404, explain="Invalid URL")
-        except Exception as e:
-            logging.error(str(e))
-            self.send_error(500)
-
-    def do_PUT(self):
-        if self.path.startswith("/front/"):
-            self.send_error(404)
+            # Части уже склеены в блоки negotiate_response
+            for chunk in response.content:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+        except ConnectionError:
+            self.close_connection = True
             return
-        try:
-            if self.path in self.paths["PUT"]:
-                self.paths["PUT"][self.path](self)
-            else:
-                handler = self.find_dynamic_handler("PUT")
-                if handler:
-                    handler(self)
-                else:
-                    self.send_error(404, explain="Invalid URL")
-        except Exception as e:
-            logging.error(str(e))
-            self.send_error(500)
+        except Exception:
+            # Заголовки уже отправлены, сменить статус нельзя: обрываем
+            # соединение без завершающего блока, и клиент видит неполный ответ
+            logging.exception("Ошибка при потоковой отдаче ответа")
+            self.close_connection = True
+            return
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
 
+    def send_connection_header(self):
+        if self.requests_handled >= self.max_requests:
+            self.send_header("Connection", "close")
+        elif self.request_version == "HTTP/1.0" and not self.close_connection:
+            self.send_header("Connection", "keep-alive")
 
-    def do_DELETE(self):
-        if self.path.startswith("/front/"):
-            self.send_error(404)
-            return
+    def find_handler(self, method: str) -> Route | None:
+        route, self.path_params = self.router.match(method, self.path)
+        return route
+
+    def dispatch(self):
+        method = self.command
         try:
-            if self.path in self.paths["DELETE"]:
-                self.paths["DELETE"][self.path](self)
-            else:
-                handler = self.find_dynamic_handler("DELETE")
-                if handler:
-                    handler(self)
+            if self.path.startswith(STATIC_URL):
+                if method == "GET":
+                    self.serve_static()
                 else:
-                    self.send_error(404, explain="Invalid URL")
+                    self.send_error(404)
+                return
+            route = self.find_handler(method)
+            if route is None:
+                self.send_error(404, explain=f"Page {self.path} not found" if method == "GET" else "Invalid URL")
+                return
+            self.resp(self.pipeline(self, route))
         except Exception as e:
             logging.error(str(e))
             self.send_error(500)
+        finally:
+            # Потоковый ответ читает из базы до конца отдачи
+            self.close_session()
+
+    do_GET = do_POST = do_PUT = do_DELETE = dispatch
 
     def serve_static(self):
-        relative_path = unquote(self.path.lstrip('/'))
-        parts = relative_path.split('/')
-        if parts[0] == "front":
-            parts = parts[1:]
-        full_path = os.path.join(FRONTEND_ROOT, *parts)
-        if not os.path.isfile(full_path):
+        response = static_response(self.path, self.headers)
+        if response is None:
             self.send_error(404, "File not found")
             return
-        import mimetypes
-        mimetype, _ = mimetypes.guess_type(full_path)
-        mimetype = mimetype or "application/octet-stream"
-        self.send_response(200)
-        self.send_header("Content-Type", mimetype)
-        self.end_headers()
-        with open(full_path, 'rb') as f:
-            self.wfile.write(f.read())
+        self.resp(response)
 
     @classmethod
-    def route(cls, methods: list[str], path: str, redirect: str = DEFAULT_URL) -> Callable:
+    def route(
+        cls,
+        methods: list[str],
+        path: str,
+        redirect: str = DEFAULT_URL,
+        cache: CachePolicy | None = None,
+    ) -> Callable:
         def decorator(function: Callable) -> Callable:
-            def inner(self: Self):
-                from back.kwargs import get_kwargs, validation_error_response
-                try:
-                    kwargs = get_kwargs(function, self)
-                    response = function(**kwargs)
-                except ValidationError as e:
-                    response = validation_error_response(self, redirect, e)
-                except Exception as e:
-                    logging.exception('Internal server error')
-                    content_type = self.headers.get("Content-Type", "")
-                    if APPLICATION_JSON in content_type:
-                        response = Response(
-                            status=400,
-                            cookie=SimpleCookie(),
-                            headers={"Content-Type": "application/json"},
-                            content=json.dumps({"form": str(e)}),
-                        )
-                    else:
-                        response = Response(
-                            status=500,
-                            cookie=SimpleCookie(),
-                            headers={"Content-Type": "text/plain"},
-                            content="Internal Server Error",
-                        )
-                self.resp(response)
-                return
-                
+            route = Route(function, redirect, cache)
             for method in methods:
-                if '{' in path and '}' in path:
-                    # Динамический путь
-                    cls.dynamic_paths[method][path] = inner
-                else:
-                    # Статический путь
-                    cls.paths[method][path] = inner
-            return inner
+                cls.router.add(method, path, route)
+            return function
         return decorator
-    
+
+    @classmethod
+    def use(cls, *middleware):
+        """Добавляет промежуточные слои (первый - внешний) и пересобирает
+        цепочку. Вызывается при запуске, а не на каждый запрос."""
+        cls.middleware = [*cls.middleware, *middleware]
+        cls.pipeline = staticmethod(compose(cls.middleware, dispatch_route))
+
+
+if SERVER_TIMING:
+    HTTPHandler.use(TimingMiddleware(SLOW_REQUEST_MS))
+HTTPHandler.use(ResponseCacheMiddleware(RESPONSE_CACHE))
+
 
 @HTTPHandler.route(["GET"], "/admin/login/")
 def admin_redirect(request: Request) -> Response:
     return Response(302, {"Location": "/admin/login"}, SimpleCookie(), "")
 
-@HTTPHandler.route(["GET"], "/")
+REGISTRATION_FIELDS = ("child_name", "child_birthdate", "parent_name", "phone", "email", "comment", "consent")
+
+
+# Ответ зависит только от этих куки; без них страница одинакова для всех
+@HTTPHandler.route(["GET"], "/", cache=CachePolicy(
+    RESPONSE_CACHE_TTL,
+    cookies=("success", "login", "password", *REGISTRATION_FIELDS, *(field + "_err" for field in REGISTRATION_FIELDS)),
+))
 def main_page(request: Request) -> Response:
     cookie = request.cookie
     form_data = {}
@@ -256,7 +306,7 @@ def main_page(request: Request) -> Response:
     else:
         cleared_cookies = cookie
 
-    for field in ["child_name", "child_birthdate", "parent_name", "phone", "email", "comment", "consent"]:
+    for field in REGISTRATION_FIELDS:
         if field in cookie:
             form_data[field] = cookie[field].value if isinstance(cookie[field], SimpleCookie) else ""
         if field + "_err" in cookie:
@@ -273,7 +323,9 @@ def main_page(request: Request) -> Response:
     )
     return Response(200, {"Content-Type": "text/html"}, cleared_cookies, content)
 
-@HTTPHandler.route(["GET"], "/login")
+@HTTPHandler.route(["GET"], "/login", cache=CachePolicy(
+    RESPONSE_CACHE_TTL, query=("deleted",), cookies=("delete_success",),
+))
 def login_page(request: Request) -> Response:
     errors = {}
     form_data = {}
@@ -399,6 +451,9 @@ def handle_form_submission(request: Request, session: Session) -> Response:
             )
             return Response(400, {"Content-Type": "text/html"}, cookie, content)
 
+    except PasswordHasherBusy:
+        # Ответ 503 формирует error_response
+        raise
     except Exception as e:
         logging.exception("CRITICAL ERROR on form submit!")
         if APPLICATION_JSON in content_type:
@@ -436,7 +491,7 @@ def login_user(request: Request, session: Session) -> Response:
     errors = {}
 
     user = session.exec(select(User).where(User.login == login)).first()
-    if not user or not user.check_password(password):
+    if not user or not user.check_password(password, session):
         errors["form"] = "Неверный логин или пароль"
 
         if APPLICATION_JSON in content_type:
@@ -479,18 +534,8 @@ def login_user(request: Request, session: Session) -> Response:
             ""
         )
         
-@HTTPHandler.route(["GET"], "/users/{id}/edit")
-def edit_form_page(request: Request, session: Session) -> Response:
-    # Получаем id из параметров пути
-    path_parts = request.path.split('/')
-    try:
-        user_id = int(path_parts[2]) if len(path_parts) >= 3 else None
-    except ValueError:
-        return Response(400, {"Content-Type": "text/html"}, SimpleCookie(), "Некорректный ID пользователя")
-    
-    if user_id is None:
-        return Response(400, {"Content-Type": "text/html"}, SimpleCookie(), "ID пользователя не указан")
-    
+@HTTPHandler.route(["GET"], "/users/{user_id:int}/edit")
+def edit_form_page(request: Request, session: Session, user_id: int) -> Response:
     auth_token = request.cookie.get("auth_token")
     token_user_id = check_token({"Authorization": f"Bearer {auth_token.value}"}, session) if auth_token else None
     
@@ -527,18 +572,8 @@ def edit_form_page(request: Request, session: Session) -> Response:
     return Response(200, {"Content-Type": "text/html"}, response_cookie, content)
 
 
-@HTTPHandler.route(["PUT", "POST"], "/users/{id}")
-def update_user_data(request: Request, session: Session) -> Response:
-    # Получаем id из параметров пути
-    path_parts = request.path.split('/')
-    try:
-        user_id = int(path_parts[2]) if len(path_parts) >= 3 else None
-    except ValueError:
-        return Response(400, {"Content-Type": "text/html"}, SimpleCookie(), "Некорректный ID пользователя")
-    
-    if user_id is None:
-        return Response(400, {"Content-Type": "text/html"}, SimpleCookie(), "ID пользователя не указан")
-    
+@HTTPHandler.route(["PUT", "POST"], "/users/{user_id:int}")
+def update_user_data(request: Request, session: Session, user_id: int) -> Response:
     auth_token = request.cookie.get("auth_token")
     token_user_id = check_token({"Authorization": f"Bearer {auth_token.value}"}, session) if auth_token else None
     
@@ -656,19 +691,8 @@ def update_user_data(request: Request, session: Session) -> Response:
             return Response(400, {"Content-Type": "text/html"}, SimpleCookie(), content)
         
 
-@HTTPHandler.route(["DELETE", "POST"], "/users/{id}/delete")
-def delete_user(request: Request, session: Session) -> Response:
-    # Получаем id из параметров пути
-    path_parts = request.path.split('/')
-    try:
-        user_id = int(path_parts[2]) if len(path_parts) >= 3 else None
-    except ValueError:
-        if request.method == "DELETE":
-            return Response(400, {"Content-Type": "application/json"}, SimpleCookie(), 
-                           json.dumps({"success": False, "message": "Некорректный ID пользователя"}))
-        else:
-            return Response(400, {"Content-Type": "text/html"}, SimpleCookie(), "Некорректный ID пользователя")
-    
+@HTTPHandler.route(["DELETE", "POST"], "/users/{user_id:int}/delete")
+def delete_user(request: Request, session: Session, user_id: int) -> Response:
     # Проверка аутентификации
     auth_token = request.cookie.get("auth_token")
     token_user_id = check_token({"Authorization": f"Bearer {auth_token.value}"}, session) if auth_token else None
@@ -765,7 +789,7 @@ def delete_user(request: Request, session: Session) -> Response:
             return Response(500, {"Content-Type": "text/html"}, SimpleCookie(), content)
         
 
-@HTTPHandler.route(["GET"], "/admin/login")
+@HTTPHandler.route(["GET"], "/admin/login", cache=CachePolicy(RESPONSE_CACHE_TTL))
 def admin_login_page(request: Request) -> Response:
     error_message = ""
     
@@ -792,7 +816,7 @@ def admin_login_handler(request: Request, session: Session) -> Response:
     try:
         admin = Admin.get_by_username(session, username)
         
-        if not admin or not admin.check_password(password):
+        if not admin or not admin.check_password(password, session):
             content = TEMPLATE_ENVIRONMENT.get_template("admin_login.html").render(
                 error_message="Неверное имя пользователя или пароль",
                 STATIC_URL=STATIC_URL,
@@ -813,6 +837,9 @@ def admin_login_handler(request: Request, session: Session) -> Response:
             cookie,
             ""
         )
+    except PasswordHasherBusy:
+        # Ответ 503 формирует error_response
+        raise
     except Exception as e:
         logging.exception("Error in admin login")
         content = TEMPLATE_ENVIRONMENT.get_template("admin_login.html").render(
@@ -829,47 +856,53 @@ def admin_dashboard(request: Request, session: Session) -> Response:
     if "admin_token" in request.cookie:
         admin_token_value = request.cookie["admin_token"].value
     
-    admin_token = AdminToken.get_by_token(session, admin_token_value) if admin_token_value else None
+    admin_id = check_admin_token({"Authorization": f"Bearer {admin_token_value}"}, session) if admin_token_value else None
     
-    if not admin_token:
+    if not admin_id:
         return Response(302, {"Location": "/admin/login"}, SimpleCookie(), "")
     
-    # Получаем список всех пользователей с их регистрационными формами
-    users_with_forms = []
-    birth_years = set()  # Для списка уникальных годов рождения
-    
-    user_forms = session.exec(
-        select(User, RegistrationForm)
+    # Число записей и годы рождения для фильтра выводятся до таблицы,
+    # поэтому считаются отдельными запросами
+    users_count = session.exec(
+        select(func.count())
+        .select_from(User)
         .join(RegistrationForm, User.id == RegistrationForm.user_id)
-    ).all()
-    
-    for user, form in user_forms:
-        # Извлекаем год из даты рождения
-        birth_year = ""
-        try:
-            if form.child_birthdate:
-                birth_year = form.child_birthdate.split('-')[0]
-                birth_years.add(birth_year)
-        except Exception:
-            pass
-            
-        users_with_forms.append({
-            "id": user.id,
-            "login": user.login,
-            "child_name": form.child_name,
-            "child_birthdate": form.child_birthdate,
-            "birth_year": birth_year,
-            "parent_name": form.parent_name,
-            "phone": form.phone,
-            "email": form.email,
-            "comment": form.comment
-        })
-    
-    # Сортируем годы для выпадающего списка
-    birth_years = sorted(birth_years, reverse=True)
-    
-    content = TEMPLATE_ENVIRONMENT.get_template("admin_dashboard.html").render(
-        users=users_with_forms,
+    ).one()
+    birth_years = sorted(
+        {year for year in session.exec(
+            select(func.substring_index(RegistrationForm.child_birthdate, "-", 1))
+            .join(User, User.id == RegistrationForm.user_id)
+            .distinct()
+        ) if year},
+        reverse=True,
+    )
+
+    def users_with_forms():
+        # Строки читаются с сервера порциями по мере отдачи страницы
+        user_forms = session.exec(
+            select(User, RegistrationForm)
+            .join(RegistrationForm, User.id == RegistrationForm.user_id)
+            .execution_options(yield_per=500)
+        )
+        for user, form in user_forms:
+            # Извлекаем год из даты рождения
+            birth_year = form.child_birthdate.split('-')[0] if form.child_birthdate else ""
+            yield {
+                "id": user.id,
+                "login": user.login,
+                "child_name": form.child_name,
+                "child_birthdate": form.child_birthdate,
+                "birth_year": birth_year,
+                "parent_name": form.parent_name,
+                "phone": form.phone,
+                "email": form.email,
+                "comment": form.comment
+            }
+
+    # Страница отдается по мере рендеринга (Transfer-Encoding: chunked)
+    content = TEMPLATE_ENVIRONMENT.get_template("admin_dashboard.html").stream(
+        users=users_with_forms(),
+        users_count=users_count,
         birth_years=birth_years,
         STATIC_URL=STATIC_URL,
         DEFAULT_URL=DEFAULT_URL
@@ -884,6 +917,7 @@ def admin_logout(request: Request, session: Session) -> Response:
     
     if admin_token_value:
         AdminToken.invalidate_token(session, admin_token_value)
+        revoke_tokens(session, admin_tokens=[admin_token_value])
     
     # Очищаем куки
     cookie = SimpleCookie()
@@ -896,4 +930,56 @@ def admin_logout(request: Request, session: Session) -> Response:
         {"Location": "/admin/login"},
         cookie,
         ""
-    )
\ No newline at end of file
+    )
+
+
+def internal_request(request: Request) -> bool:
+    token = request.headers.get("X-Internal-Token", "")
+    return bool(INTERNAL_TOKEN) and secrets.compare_digest(token, INTERNAL_TOKEN)
+
+
+def not_found() -> Response:
+    return Response(404, {"Content-Type": "text/plain"}, SimpleCookie(), "Not Found")
+
+
+@HTTPHandler.route(["GET"], "/internal/static-cache")
+def static_cache_stats(request: Request) -> Response:
+    if not internal_request(request):
+        return not_found()
+    return Response(
+        200,
+        {"Content-Type": APPLICATION_JSON},
+        SimpleCookie(),
+        json.dumps({"assets": ASSET_CACHE.stats(), "compressed": COMPRESSED_CACHE.stats()}),
+    )
+
+
+@HTTPHandler.route(["GET"], "/internal/response-cache")
+def response_cache_stats(request: Request) -> Response:
+    if not internal_request(request):
+        return not_found()
+    return Response(200, {"Content-Type": APPLICATION_JSON}, SimpleCookie(), json.dumps(RESPONSE_CACHE.stats()))
+
+
+@HTTPHandler.route(["GET"], "/internal/pool")
+def pool_stats(request: Request) -> Response:
+    # Статистика пула текущего процесса; в prefork у каждого процесса свой пул
+    if not internal_request(request):
+        return not_found()
+    stats = {"pid": os.getpid(), **engine.pool.stats()}
+    return Response(200, {"Content-Type": APPLICATION_JSON}, SimpleCookie(), json.dumps(stats))
+
+
+@HTTPHandler.route(["GET"], "/internal/token-cache")
+def token_cache_stats(request: Request) -> Response:
+    if not internal_request(request):
+        return not_found()
+    return Response(200, {"Content-Type": APPLICATION_JSON}, SimpleCookie(), json.dumps(TOKEN_CACHE.stats()))
+
+
+@HTTPHandler.route(["GET"], "/internal/scheduler")
+def scheduler_stats(request: Request) -> Response:
+    # Счетчики текущего процесса: задачи, отданные ведущему, видны в not_leader
+    if not internal_request(request):
+        return not_found()
+    return Response(200, {"Content-Type": APPLICATION_JSON}, SimpleCookie(), json.dumps(SCHEDULER.stats()))
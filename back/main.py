@@ -1,11 +1,56 @@
+import asyncio
+import socket
+import time
 from http.server import HTTPServer
-from sqlmodel import SQLModel, Session
+from sqlmodel import SQLModel
 import logging
 from back.handler import HTTPHandler
-from back.config import HOST, PORT, engine
+from back.config import (
+    ASSETS_BUILD, DB_MIGRATE, HOST, PORT, SERVER_MODE, SERVER_PROCESSES, SERVER_WORKERS,
+    SCHEDULER_ENABLED, STATIC_PRECOMPRESS, TEMPLATE_ENVIRONMENT, engine,
+)
 from back.models import init_admin
-from back.utils import cleanup_expired_tokens, delete_inactive_tokens
 from back.db_utils import wait_for_db
+from back.migrations import migrate
+from back.scheduler import SCHEDULER
+import back.token_manager  # noqa: F401 - регистрирует задачи очистки токенов
+from back.assets import build as build_assets
+from back.bundler import build_bundles
+from back.async_server import AsyncHTTPServer
+from back.compression import precompress
+from back.server import PreforkSupervisor, SingleHTTPServer, ThreadPoolHTTPServer, server_from_socket
+
+
+def create_server(mode: str = SERVER_MODE, address: tuple[str, int] = (HOST, PORT)) -> HTTPServer:
+    if mode == "threaded":
+        return ThreadPoolHTTPServer(address, HTTPHandler)
+    if mode == "single":
+        # Единственный поток нельзя отдавать простаивающему keep-alive соединению
+        HTTPHandler.max_requests = 1
+        return SingleHTTPServer(address, HTTPHandler)
+    raise ValueError(f"Unknown SERVER_MODE: {mode}")
+
+
+def warm_up_templates() -> int:
+    """Компилирует все шаблоны заранее, чтобы первый запрос к странице не
+    ждал разбора шаблона. В prefork скомпилированные шаблоны наследуются
+    рабочими процессами."""
+    names = TEMPLATE_ENVIRONMENT.list_templates(extensions=["html"])
+    for name in names:
+        TEMPLATE_ENVIRONMENT.get_template(name)
+    return len(names)
+
+
+def worker_server(sock: socket.socket) -> HTTPServer:
+    # Соединения, унаследованные от супервизора, не закрываем - у каждого
+    # процесса должен быть собственный пул
+    engine.dispose(close=False)
+    # Потоки не переживают fork, поэтому задачи запускаются в рабочих
+    # процессах; выполняет их тот, кто держит блокировку задачи
+    if SCHEDULER_ENABLED:
+        SCHEDULER.start()
+    return server_from_socket(ThreadPoolHTTPServer, sock, HTTPHandler)
+
 
 def main():
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -13,23 +58,52 @@ def main():
     wait_for_db(max_retries=60, retry_interval=2)
     
     SQLModel.metadata.create_all(engine)
+
+    if DB_MIGRATE:
+        applied = migrate(engine)
+        if applied > 0:
+            logging.info(f"Применено {applied} миграций схемы")
     
     #init_admin()
     
-    with Session(engine) as session:
-        # Деактивируем просроченные токены
-        expired = cleanup_expired_tokens(session)
-        if expired > 0:
-            logging.info(f"Деактивировано {expired} просроченных токенов")
-        
-        # Удаляем все неактивные токены без ожидания
-        deleted = delete_inactive_tokens(session)
-        if deleted > 0:
-            logging.info(f"Удалено {deleted} неактивных токенов")
-    
+    if ASSETS_BUILD:
+        # Бандлы собираются первыми, чтобы получить хеш вместе с остальными
+        # файлами, а сжатие идет последним, чтобы копии с хешем тоже
+        # получили .gz/.br
+        build_bundles()
+        assets = build_assets()
+        logging.info(f"Собрано {len(assets)} статических файлов с хешем в имени")
+
+    if STATIC_PRECOMPRESS:
+        compressed = precompress()
+        if compressed > 0:
+            logging.info(f"Создано {compressed} сжатых копий статических файлов")
+
+    started = time.perf_counter()
+    templates = warm_up_templates()
+    logging.info(f"Скомпилировано {templates} шаблонов за {(time.perf_counter() - started) * 1000:.1f} мс")
+
     # Запуск сервера
-    httpd = HTTPServer((HOST, PORT), HTTPHandler)
-    print(f"Server started at http://{HOST}:{PORT}")
+    if SERVER_MODE == "prefork":
+        engine.dispose()
+        supervisor = PreforkSupervisor((HOST, PORT), worker_server)
+        print(f"Server started at http://{HOST}:{PORT} ({SERVER_PROCESSES} processes x {SERVER_WORKERS} workers)")
+        supervisor.serve_forever()
+        return
+
+    if SCHEDULER_ENABLED:
+        SCHEDULER.start()
+
+    if SERVER_MODE == "asyncio":
+        print(f"Server started at http://{HOST}:{PORT} (asyncio, {SERVER_WORKERS} executor threads)")
+        asyncio.run(AsyncHTTPServer(HOST, PORT).serve_forever())
+        return
+
+    httpd = create_server()
+    if SERVER_MODE == "threaded":
+        print(f"Server started at http://{HOST}:{PORT} ({SERVER_WORKERS} workers)")
+    else:
+        print(f"Server started at http://{HOST}:{PORT}")
     httpd.serve_forever()
 
 if __name__ == "__main__":
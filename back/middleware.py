@@ -0,0 +1,111 @@
+import logging
+import time
+from collections.abc import Callable, Iterable
+
+from back.cache import ResponseCache
+from back.custom_types import Response, Route
+
+# Звено цепочки: (handler, route) -> Response. handler - HTTPHandler или
+# AsyncRequestHandler, route - Route из HTTPHandler.router
+Call = Callable[[object, Route], Response]
+
+
+class Middleware:
+    """Базовый класс промежуточного слоя с хуками before/after.
+
+    before может вернуть готовый ответ - тогда обработчик маршрута и
+    более глубокие слои не вызываются, но after этого слоя выполняется.
+    Для полного контроля (например, try/finally вокруг вызова) можно
+    переопределить wrap.
+
+    Замыкание собирается один раз в wrap; хуки, не переопределенные в
+    подклассе, в него не попадают.
+    """
+
+    def before(self, handler, route: Route) -> Response | None:
+        return None
+
+    def after(self, handler, route: Route, response: Response) -> Response:
+        return response
+
+    def wrap(self, call_next: Call) -> Call:
+        has_before = type(self).before is not Middleware.before
+        has_after = type(self).after is not Middleware.after
+        before, after = self.before, self.after
+        if has_before and has_after:
+            def call(handler, route):
+                response = before(handler, route)
+                if response is None:
+                    response = call_next(handler, route)
+                return after(handler, route, response)
+        elif has_before:
+            def call(handler, route):
+                response = before(handler, route)
+                return call_next(handler, route) if response is None else response
+        elif has_after:
+            def call(handler, route):
+                return after(handler, route, call_next(handler, route))
+        else:
+            call = call_next
+        return call
+
+
+def compose(middleware: Iterable[Middleware | Callable[[Call], Call]], endpoint: Call) -> Call:
+    """Собирает цепочку; первый слой в списке - внешний.
+
+    Слой - экземпляр Middleware или функция call_next -> call. Пустая
+    цепочка возвращает сам endpoint, без дополнительных вызовов.
+    """
+    call = endpoint
+    for layer in reversed(list(middleware)):
+        call = layer.wrap(call) if isinstance(layer, Middleware) else layer(call)
+    return call
+
+
+class ResponseCacheMiddleware(Middleware):
+    """Кеш ответов для маршрутов, объявленных с cache=CachePolicy(...).
+
+    Ответы с Set-Cookie и ошибки ResponseCache не сохраняет.
+    """
+
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+
+    def wrap(self, call_next: Call) -> Call:
+        cache = self.cache
+
+        def call(handler, route):
+            policy = route.cache
+            if policy is None:
+                return call_next(handler, route)
+            key = policy.key(handler.command, handler.path, handler.query, handler.headers.get("Cookie", ""))
+            response = cache.get_response(key)
+            if response is None:
+                response = call_next(handler, route)
+                cache.set_response(key, response, policy.ttl)
+            return response
+
+        return call
+
+
+class TimingMiddleware(Middleware):
+    """Заголовок Server-Timing с временем обработчика и предупреждение в
+    лог о медленных запросах. Для потокового ответа учитывается время
+    до начала отдачи тела."""
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+
+    def wrap(self, call_next: Call) -> Call:
+        slow_ms = self.slow_ms
+
+        def call(handler, route):
+            started = time.perf_counter()
+            response = call_next(handler, route)
+            elapsed = (time.perf_counter() - started) * 1000
+            response.headers["Server-Timing"] = f"app;dur={elapsed:.1f}"
+            if elapsed >= slow_ms:
+                logging.warning(f"Медленный запрос {handler.command} {handler.path}: {elapsed:.0f} мс")
+            return response
+
+        return call
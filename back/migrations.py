@@ -0,0 +1,244 @@
+"""Версионированные миграции схемы.
+
+SQLModel.metadata.create_all создает только отсутствующие таблицы и не
+меняет существующие, поэтому изменения схемы уже развернутых баз
+(индексы, уникальные ограничения, типы столбцов) описываются здесь.
+
+Миграции применяются по возрастанию версии; номер каждой примененной
+записывается в таблицу schema_version. DDL в MySQL не транзакционный,
+поэтому каждый шаг миграции идемпотентен: он сначала проверяет схему и
+ничего не делает, если изменение уже есть (например, в новой базе его
+создал create_all по описанию модели). Прерванную миграцию можно
+безопасно запустить повторно.
+
+    python -m back.migrations          # применить новые миграции
+    python -m back.migrations status   # текущая версия и ожидающие миграции
+"""
+import logging
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, Connection, DateTime, Engine, Integer, MetaData, String, Table,
+    func, inspect, select, text,
+)
+from sqlalchemy.types import TypeEngine
+
+# Имя блокировки GET_LOCK: несколько экземпляров приложения, запущенных
+# одновременно, применяют миграции по очереди
+LOCK_NAME = "sportscool:migrations"
+
+metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Регистрирует функцию как миграцию с указанной версией."""
+    def decorator(function: Callable[[Connection], None]):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} is out of order")
+        MIGRATIONS.append(Migration(version, description, function))
+        return function
+    return decorator
+
+
+def _quote(connection: Connection, name: str) -> str:
+    return connection.dialect.identifier_preparer.quote(name)
+
+
+def has_index(connection: Connection, table: str, columns: list[str], unique: bool = False) -> bool:
+    """Есть ли индекс, начинающийся с columns. Для unique=True подходит
+    только уникальный индекс ровно по этим столбцам.
+
+    InnoDB сам создает индекс для внешнего ключа, поэтому для столбцов
+    с FOREIGN KEY индекс обычно уже есть под именем ограничения.
+    """
+    for index in inspect(connection).get_indexes(table):
+        names = index["column_names"]
+        if unique:
+            if index["unique"] and names == columns:
+                return True
+        elif names[:len(columns)] == columns:
+            return True
+    if not unique:
+        primary = inspect(connection).get_pk_constraint(table)["constrained_columns"]
+        return primary[:len(columns)] == columns
+    return False
+
+
+def create_index(connection: Connection, table: str, name: str, columns: list[str], unique: bool = False):
+    """CREATE [UNIQUE] INDEX, если подходящего индекса еще нет."""
+    if has_index(connection, table, columns, unique):
+        logging.info(f"Индекс по {table}({', '.join(columns)}) уже есть")
+        return
+    connection.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {_quote(connection, name)} "
+        f"ON {_quote(connection, table)} ({', '.join(_quote(connection, column) for column in columns)})"
+    ))
+    logging.info(f"Создан индекс {name} по {table}({', '.join(columns)})")
+
+
+def change_column_type(connection: Connection, table: str, column: str, type_: TypeEngine, nullable: bool):
+    """ALTER TABLE ... MODIFY (синтаксис MySQL), если тип столбца другой.
+
+    MODIFY перестраивает таблицу, поэтому на больших таблицах миграцию
+    лучше применять через CLI до развертывания.
+    """
+    dialect = connection.dialect
+    target = type_.compile(dialect=dialect)
+    for current in inspect(connection).get_columns(table):
+        if current["name"] != column:
+            continue
+        # Отбрасываем CHARACTER SET / COLLATE отраженного типа
+        if current["type"].compile(dialect=dialect).split(" ")[0] == target:
+            logging.info(f"Столбец {table}.{column} уже имеет тип {target}")
+            return
+        connection.execute(text(
+            f"ALTER TABLE {_quote(connection, table)} MODIFY {_quote(connection, column)} "
+            f"{target} {'NULL' if nullable else 'NOT NULL'}"
+        ))
+        logging.info(f"Тип столбца {table}.{column} изменен на {target}")
+        return
+    raise LookupError(f"Column {table}.{column} does not exist")
+
+
+# Токены - secrets.token_urlsafe(32), 43 символа. VARCHAR(64) вместо
+# VARCHAR(255) по умолчанию уменьшает уникальный индекс по ним
+
+@migration(1, "token.token: VARCHAR(64), уникальный индекс")
+def token_lookup_index(connection: Connection):
+    change_column_type(connection, "token", "token", String(64), nullable=False)
+    create_index(connection, "token", "ix_token_token", ["token"], unique=True)
+
+
+@migration(2, "token.user_id: индекс")
+def token_user_index(connection: Connection):
+    create_index(connection, "token", "ix_token_user_id", ["user_id"])
+
+
+@migration(3, "admintoken.token: VARCHAR(64), уникальный индекс")
+def admin_token_lookup_index(connection: Connection):
+    change_column_type(connection, "admintoken", "token", String(64), nullable=False)
+    create_index(connection, "admintoken", "ix_admintoken_token", ["token"], unique=True)
+
+
+@migration(4, "registrationform.user_id: индекс")
+def registration_user_index(connection: Connection):
+    create_index(connection, "registrationform", "ix_registrationform_user_id", ["user_id"])
+
+
+@migration(5, "tokenrevocation: начальная строка версии отзыва")
+def token_revocation_row(connection: Connection):
+    # В базе, созданной до появления модели TokenRevocation, таблицы нет;
+    # в новой ее уже создал create_all
+    from back.models import TokenRevocation
+
+    TokenRevocation.__table__.create(connection, checkfirst=True)
+    exists = connection.execute(text("SELECT 1 FROM tokenrevocation WHERE id = 1")).first()
+    if exists:
+        logging.info("Строка tokenrevocation уже есть")
+        return
+    connection.execute(text("INSERT INTO tokenrevocation (id, version) VALUES (1, 0)"))
+    logging.info("Создана строка tokenrevocation")
+
+
+@migration(6, "token(active, expiration_time): индекс для пакетной очистки")
+def token_cleanup_index(connection: Connection):
+    # Без него каждая порция UPDATE/DELETE ... LIMIT просматривает и
+    # блокирует всю таблицу
+    create_index(connection, "token", "ix_token_active_expiration_time", ["active", "expiration_time"])
+
+
+def current_version(connection: Connection) -> int:
+    if not inspect(connection).has_table(schema_version.name):
+        return 0
+    return connection.execute(select(func.coalesce(func.max(schema_version.c.version), 0))).scalar_one()
+
+
+def pending(connection: Connection) -> list[Migration]:
+    version = current_version(connection)
+    return [item for item in MIGRATIONS if item.version > version]
+
+
+def _acquire_lock(connection: Connection, timeout: int) -> bool:
+    if connection.dialect.name != "mysql":
+        return True
+    return connection.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": LOCK_NAME, "timeout": timeout}).scalar() == 1
+
+
+def _release_lock(connection: Connection):
+    if connection.dialect.name == "mysql":
+        connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+
+
+def migrate(engine: Engine, lock_timeout: int = 60) -> int:
+    """Применяет ожидающие миграции, возвращает их количество."""
+    with engine.connect() as connection:
+        if not _acquire_lock(connection, lock_timeout):
+            raise TimeoutError(f"Не удалось получить блокировку {LOCK_NAME} за {lock_timeout} сек")
+        try:
+            metadata.create_all(connection)
+            connection.commit()
+            version = current_version(connection)
+            if MIGRATIONS and version > MIGRATIONS[-1].version:
+                logging.warning(
+                    f"Версия схемы {version} новее последней известной миграции {MIGRATIONS[-1].version}"
+                )
+            applied = 0
+            for item in MIGRATIONS:
+                if item.version <= version:
+                    continue
+                started = time.perf_counter()
+                logging.info(f"Миграция {item.version}: {item.description}")
+                item.apply(connection)
+                connection.execute(schema_version.insert().values(
+                    version=item.version, description=item.description, applied_at=datetime.now(),
+                ))
+                connection.commit()
+                logging.info(f"Миграция {item.version} применена за {time.perf_counter() - started:.2f} сек")
+                applied += 1
+            return applied
+        finally:
+            _release_lock(connection)
+            connection.commit()
+
+
+def status(engine: Engine) -> tuple[int, list[Migration]]:
+    with engine.connect() as connection:
+        return current_version(connection), pending(connection)
+
+
+if __name__ == "__main__":
+    from back.config import engine
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "status":
+        version, waiting = status(engine)
+        logging.info(f"Текущая версия схемы: {version}")
+        for item in waiting:
+            logging.info(f"Ожидает: {item.version} - {item.description}")
+    elif command == "upgrade":
+        logging.info(f"Применено миграций: {migrate(engine)}")
+    else:
+        sys.exit(f"Неизвестная команда {command}; доступны upgrade и status")
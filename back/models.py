@@ -1,23 +1,25 @@
 from datetime import datetime, timedelta
 import logging
 from typing import List, Optional
-import hashlib
 import secrets
 
-from sqlalchemy import Engine
+from sqlalchemy import Engine, Index
 from sqlmodel import SQLModel, Field, Relationship, Session, delete, select, update
+from back.passwords import hash_password, needs_rehash, verify_password
 from back.validators import RegistrationFormModel
 
-def hash_password(password: str, salt: bytes = None) -> tuple[str, str]:
-    if salt is None:
-        salt = secrets.token_bytes(16)
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
-    return hashed.hex(), salt.hex()
-
-def check_password(plain_password: str, password_hash: str, salt_hex: str) -> bool:
-    salt = bytes.fromhex(salt_hex)
-    hashed = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt, 100000)
-    return hashed.hex() == password_hash
+def check_account_password(session: Optional[Session], account, password: str) -> bool:
+    """Проверяет пароль User или Admin. Если хеш в старом формате или
+    с устаревшей стоимостью и передана сессия, пароль сразу хешируется
+    заново по текущей политике."""
+    if not verify_password(password, account.password_hash, account.password_salt):
+        return False
+    if session is not None and needs_rehash(account.password_hash):
+        account.password_hash = hash_password(password)
+        account.password_salt = ""
+        session.add(account)
+        session.commit()
+    return True
 
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -29,8 +31,8 @@ class User(SQLModel, table=True):
 
     @classmethod
     def create(cls, session: Session, login: str, plain_password: str) -> "User":
-        password_hash, salt = hash_password(plain_password)
-        user = cls(login=login, password_hash=password_hash, password_salt=salt)
+        # Соль хранится в password_hash; password_salt нужен только старым хешам
+        user = cls(login=login, password_hash=hash_password(plain_password), password_salt="")
         session.add(user)
         session.commit()
         session.refresh(user)
@@ -46,13 +48,17 @@ class User(SQLModel, table=True):
         if user:
             # Удаление связанных данных
             RegistrationForm.delete_registration(session, user_id)
+            tokens = session.exec(select(Token.token).where(Token.user_id == user_id)).all()
             session.exec(delete(Token).where(Token.user_id == user_id))
             session.delete(user)
             session.commit()
+            # back.utils импортирует models, поэтому импорт здесь
+            from back.utils import revoke_tokens
+            revoke_tokens(session, user_tokens=tokens)
 
 
-    def check_password(self, password: str) -> bool:
-        return check_password(password, self.password_hash, self.password_salt)
+    def check_password(self, password: str, session: Optional[Session] = None) -> bool:
+        return check_account_password(session, self, password)
 
 class RegistrationForm(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -64,7 +70,7 @@ class RegistrationForm(SQLModel, table=True):
     comment: Optional[str] = Field(default=None, max_length=200)
     consent: bool
 
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     user: User = Relationship(back_populates="registration")
 
     @classmethod
@@ -91,13 +97,27 @@ class RegistrationForm(SQLModel, table=True):
             session.commit()
 
 class Token(SQLModel, table=True):
+    # Индексы существующих баз создаются миграциями в back/migrations.py
+    # Для очистки: active + срок действия
+    __table_args__ = (Index("ix_token_active_expiration_time", "active", "expiration_time"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id")
-    token: str
+    user_id: int = Field(foreign_key="user.id", index=True)
+    token: str = Field(max_length=64, unique=True, index=True)
     expiration_time: datetime
     active: bool = True
 
 
+class TokenRevocation(SQLModel, table=True):
+    """Единственная строка (id=1) с номером версии отзыва токенов.
+
+    Номер увеличивается при выходе, удалении пользователя и отзыве его
+    токенов; процессы сверяют его, чтобы сбросить кеш проверки токенов.
+    """
+    id: int = Field(default=1, primary_key=True)
+    version: int = 0
+
+
 class Admin(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(unique=True)
@@ -108,8 +128,7 @@ class Admin(SQLModel, table=True):
     
     @classmethod
     def create(cls, session: Session, username: str, plain_password: str) -> "Admin":
-        password_hash, salt = hash_password(plain_password)
-        admin = cls(username=username, password_hash=password_hash, password_salt=salt)
+        admin = cls(username=username, password_hash=hash_password(plain_password), password_salt="")
         session.add(admin)
         session.commit()
         session.refresh(admin)
@@ -119,8 +138,8 @@ class Admin(SQLModel, table=True):
     def get_by_username(cls, session: Session, username: str) -> Optional["Admin"]:
         return session.exec(select(Admin).where(Admin.username == username)).first()
     
-    def check_password(self, password: str) -> bool:
-        return check_password(password, self.password_hash, self.password_salt)
+    def check_password(self, password: str, session: Optional[Session] = None) -> bool:
+        return check_account_password(session, self, password)
     
     def create_token(self, session: Session) -> str:
         token_value = secrets.token_urlsafe(32)
@@ -142,31 +161,34 @@ class Admin(SQLModel, table=True):
 class AdminToken(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     admin_id: int = Field(foreign_key="admin.id")
-    token: str
+    token: str = Field(max_length=64, unique=True, index=True)
     expiration_time: datetime
     active: bool = True
     
     admin: Admin = Relationship(back_populates="admin_tokens")
     
     @classmethod
-    def invalidate_expired(cls, session: Session) -> None:
-        """Инвалидирует просроченные токены"""
-        session.exec(
+    def invalidate_expired(cls, session: Session) -> int:
+        """Инвалидирует просроченные токены. Вызывается фоновой очисткой,
+        а не при проверке токена: срок проверяет get_by_token"""
+        result = session.exec(
             update(AdminToken)
             .where(AdminToken.expiration_time < datetime.now())
             .where(AdminToken.active == True)
             .values(active=False)
         )
         session.commit()
+        return result.rowcount
     
     @classmethod
     def get_by_token(cls, session: Session, token_value: str) -> Optional["AdminToken"]:
-        """Получает токен по его значению"""
-        cls.invalidate_expired(session)
+        """Получает действующий токен по его значению. Только чтение по
+        индексу: просроченный токен отсекается условием на срок"""
         return session.exec(
             select(AdminToken)
             .where(AdminToken.token == token_value)
             .where(AdminToken.active == True)
+            .where(AdminToken.expiration_time > datetime.now())
         ).first()
     
     @classmethod
@@ -0,0 +1,115 @@
+"""Хеширование паролей.
+
+Формат хранимого хеша: "pbkdf2_sha256$<итерации>$<соль hex>$<хеш hex>" -
+алгоритм и стоимость хранятся вместе с хешем, поэтому PASSWORD_HASH_ITERATIONS
+можно менять без сброса паролей: старые хеши проверяются со своими
+параметрами и пересчитываются при следующем успешном входе.
+
+Хеши в старом формате (только hex в password_hash, соль в password_salt,
+100000 итераций) по-прежнему принимаются.
+
+PBKDF2 выполняется в отдельном пуле процессов, чтобы вход и регистрация
+не занимали ядро потока, обслуживающего запросы. Очередь ограничена:
+если все места заняты дольше PASSWORD_HASH_TIMEOUT, поднимается
+PasswordHasherBusy и запрос получает 503.
+"""
+import hashlib
+import hmac
+import multiprocessing
+import secrets
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from back.config import (
+    PASSWORD_HASH_ITERATIONS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT,
+    PASSWORD_HASH_WORKERS,
+)
+
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000
+SALT_BYTES = 16
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+class PasswordHasher:
+    """Пул процессов для PBKDF2 с ограниченной очередью.
+
+    workers=0 - вычисление в вызывающем потоке. Пул создается при первом
+    вызове в том процессе, который его использует: в prefork у каждого
+    рабочего процесса свой пул. Процессы пула запускаются через
+    forkserver, а не fork - процесс сервера многопоточный.
+    """
+
+    def __init__(self, workers: int, queue: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        # Задачи в работе и в очереди
+        self._slots = threading.BoundedSemaphore(workers + queue) if workers else None
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._executor
+
+    def derive(self, password: str, salt: bytes, iterations: int) -> bytes:
+        if not self.workers:
+            return pbkdf2(password, salt, iterations)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy("Сервер перегружен, повторите попытку позже")
+        try:
+            future: Future = self._pool().submit(pbkdf2, password, salt, iterations)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+HASHER = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT)
+
+
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = HASHER.derive(password, salt, iterations)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def parse_hash(encoded: str, legacy_salt: str = "") -> tuple[str, int, bytes, bytes]:
+    """(алгоритм, итерации, соль, хеш); старый формат - без "$"."""
+    if "$" not in encoded:
+        return ALGORITHM, LEGACY_ITERATIONS, bytes.fromhex(legacy_salt), bytes.fromhex(encoded)
+    algorithm, iterations, salt, digest = encoded.split("$")
+    return algorithm, int(iterations), bytes.fromhex(salt), bytes.fromhex(digest)
+
+
+def verify_password(password: str, encoded: str, legacy_salt: str = "") -> bool:
+    algorithm, iterations, salt, expected = parse_hash(encoded, legacy_salt)
+    if algorithm != ALGORITHM:
+        raise ValueError(f"Unsupported password hash algorithm {algorithm}")
+    return hmac.compare_digest(HASHER.derive(password, salt, iterations), expected)
+
+
+def needs_rehash(encoded: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> bool:
+    """Хеш в старом формате или с другой стоимостью."""
+    if "$" not in encoded:
+        return True
+    algorithm, stored_iterations = encoded.split("$")[:2]
+    return algorithm != ALGORITHM or int(stored_iterations) != iterations
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который считает выдачи соединений и время ожидания.
+
+    Время выдачи включает ожидание свободного соединения и открытие
+    нового, если пул еще не заполнен. Статистика своя у каждого
+    процесса и сбрасывается при engine.dispose().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        # QueuePool._do_get вызывает себя рекурсивно - считаем только внешний вызов
+        if getattr(self._local, "timing", False):
+            return super()._do_get()
+        self._local.timing = True
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            self._local.timing = False
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return connection
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            checkouts, timeouts = self.checkouts, self.timeouts
+            wait_total, wait_max = self.wait_total, self.wait_max
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            # Отрицательное значение - столько соединений еще можно открыть до pool_size
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_avg": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_ms_max": round(wait_max * 1000, 3),
+        }
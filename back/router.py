@@ -0,0 +1,97 @@
+from collections.abc import Callable
+from typing import Any
+
+
+def _int(segment: str) -> int | None:
+    return int(segment) if segment.isascii() and segment.isdigit() else None
+
+
+def _str(segment: str) -> str | None:
+    return segment or None
+
+
+# Конвертеры параметров пути в порядке приоритета: при совпадении
+# нескольких параметрических веток первой проверяется более строгая
+CONVERTERS: dict[str, Callable[[str], Any]] = {"int": _int, "str": _str}
+
+
+class _Node:
+    __slots__ = ("children", "params", "handlers")
+
+    def __init__(self):
+        # статический сегмент -> узел
+        self.children: dict[str, _Node] = {}
+        # имя конвертера -> узел
+        self.params: dict[str, _Node] = {}
+        # метод -> (обработчик, имена параметров по порядку)
+        self.handlers: dict[str, tuple[Callable, tuple[str, ...]]] = {}
+
+
+class Router:
+    """Дерево маршрутов, компилируемое при регистрации.
+
+    Шаблон состоит из сегментов, разделенных "/"; сегмент вида {name}
+    или {name:int} - параметр, значение которого после конвертации
+    попадает в Request.params. Полностью статические пути ищутся одним
+    обращением к словарю, остальные - проходом по дереву, время
+    которого зависит от глубины пути, а не от числа маршрутов.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.static: dict[str, dict[str, Callable]] = {}
+        self.methods: set[str] = set()
+
+    def add(self, method: str, pattern: str, handler: Callable):
+        node = self.root
+        names = []
+        for segment in pattern.split("/"):
+            if segment.startswith("{") and segment.endswith("}"):
+                name, _, converter = segment[1:-1].partition(":")
+                converter = converter or "str"
+                if converter not in CONVERTERS:
+                    raise ValueError(f"Unknown path converter {converter!r} in {pattern}")
+                names.append(name)
+                if converter not in node.params:
+                    node.params[converter] = _Node()
+                    node.params = {
+                        key: node.params[key] for key in CONVERTERS if key in node.params
+                    }
+                node = node.params[converter]
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.handlers[method] = (handler, tuple(names))
+        if not names:
+            self.static.setdefault(method, {})[pattern] = handler
+        self.methods.add(method)
+
+    def match(self, method: str, path: str) -> tuple[Callable | None, dict[str, Any]]:
+        handler = self.static.get(method, {}).get(path)
+        if handler is not None:
+            return handler, {}
+        values = []
+        found = self._walk(self.root, path.split("/"), 0, method, values)
+        if found is None:
+            return None, {}
+        handler, names = found
+        return handler, dict(zip(names, values))
+
+    def _walk(self, node: _Node, segments: list[str], index: int, method: str, values: list):
+        if index == len(segments):
+            return node.handlers.get(method)
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._walk(child, segments, index + 1, method, values)
+            if found is not None:
+                return found
+        for converter, child in node.params.items():
+            value = CONVERTERS[converter](segment)
+            if value is None:
+                continue
+            values.append(value)
+            found = self._walk(child, segments, index + 1, method, values)
+            if found is not None:
+                return found
+            values.pop()
+        return None
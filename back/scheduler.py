@@ -0,0 +1,224 @@
+"""Периодические фоновые задачи.
+
+Каждая задача выполняется в своем потоке по расписанию с фиксированным
+шагом: если запуск длился дольше интервала, пропущенные запуски не
+выполняются подряд, а учитываются в skipped - задача не накладывается
+сама на себя.
+
+Задача с leader=True выполняется только в процессе, удерживающем
+блокировку MySQL GET_LOCK с ее именем. Блокировка берется на отдельном
+соединении вне пула запросов и не отпускается между запусками, поэтому
+при нескольких рабочих процессах и узлах задачу выполняет один из них,
+а после его остановки (соединение закрывается) - следующий, успевший
+взять блокировку. Для других СУБД каждый процесс считается ведущим.
+"""
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import NullPool
+
+from back.config import engine
+
+# Префикс имен GET_LOCK; имя блокировки в MySQL не длиннее 64 символов
+LOCK_PREFIX = "sportscool:job:"
+
+
+class Job:
+    """Задача и ее счетчики. Длительности - в миллисекундах."""
+
+    def __init__(self, name: str, function: Callable[[], object], interval: float, jitter: float, leader: bool):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.jitter = jitter
+        self.leader = leader
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        # Запуски, пропущенные из-за того, что предыдущий еще шел
+        self.skipped = 0
+        # Запуски, отданные другому процессу, который держит блокировку
+        self.not_leader = 0
+        self.last_started: float | None = None
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_error: str | None = None
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "leader": self.leader,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "not_leader": self.not_leader,
+            "last_started": self.last_started,
+            "last_ms": round(self.last_duration, 3),
+            "max_ms": round(self.max_duration, 3),
+            "avg_ms": round(self.total_duration / self.runs, 3) if self.runs else 0.0,
+            "last_error": self.last_error,
+        }
+
+
+class LeaderLock:
+    """Блокировки GET_LOCK, удерживаемые на отдельном соединении.
+
+    Соединение открывается через собственный engine без пула (NullPool),
+    поэтому не занимает место в пуле запросов. Процесс, не получивший ни
+    одной блокировки, соединение сразу закрывает - постоянно его держит
+    только ведущий.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock_engine: Engine | None = None
+        self._connection: Connection | None = None
+        self._held: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        if self._lock_engine is None:
+            self._lock_engine = create_engine(self.engine.url, poolclass=NullPool)
+        return self._lock_engine.connect()
+
+    def hold(self, name: str) -> bool:
+        """Берет или подтверждает блокировку; True - процесс ведущий."""
+        if self.engine.dialect.name != "mysql":
+            return True
+        lock_name = LOCK_PREFIX + name
+        with self._lock:
+            try:
+                if self._connection is None:
+                    self._connection = self._connect()
+                    self._held.clear()
+                connection = self._connection
+                if name in self._held:
+                    # Заодно не дает соединению простоять дольше wait_timeout
+                    owned = connection.execute(
+                        text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": lock_name}
+                    ).scalar()
+                    if not owned:
+                        self._held.discard(name)
+                if name not in self._held:
+                    acquired = connection.execute(
+                        text("SELECT GET_LOCK(:name, 0)"), {"name": lock_name}
+                    ).scalar()
+                    if acquired == 1:
+                        self._held.add(name)
+                        logging.info(f"Процесс стал ведущим для задачи {name}")
+                # GET_LOCK не транзакционный, откат только закрывает транзакцию
+                connection.rollback()
+                held = name in self._held
+                if not self._held:
+                    self._close()
+                return held
+            except SQLAlchemyError as e:
+                logging.warning(f"Не удалось проверить блокировку задачи {name}: {e}")
+                self._close()
+                return False
+
+    def _close(self):
+        # Закрытие соединения снимает все его блокировки
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except SQLAlchemyError:
+                pass
+        self._connection = None
+        self._held.clear()
+
+    def release(self):
+        with self._lock:
+            self._close()
+            if self._lock_engine is not None:
+                self._lock_engine.dispose()
+                self._lock_engine = None
+
+
+class Scheduler:
+    def __init__(self, engine: Engine):
+        self.jobs: dict[str, Job] = {}
+        self.leader_lock = LeaderLock(engine)
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def job(self, name: str, interval: float, jitter: float = 0.0, leader: bool = True):
+        """Декоратор: регистрирует функцию без аргументов как задачу.
+
+        Первый запуск - через случайную задержку до jitter секунд после
+        start, следующие - каждые interval секунд плюс до jitter секунд,
+        чтобы процессы и узлы не обращались к базе одновременно.
+        """
+        def decorator(function: Callable[[], object]):
+            if name in self.jobs:
+                raise ValueError(f"Job {name} is already registered")
+            self.jobs[name] = Job(name, function, interval, jitter, leader)
+            return function
+        return decorator
+
+    def run_job(self, job: Job):
+        if job.leader and not self.leader_lock.hold(job.name):
+            job.not_leader += 1
+            return
+        job.running = True
+        job.last_started = time.time()
+        started = time.perf_counter()
+        try:
+            job.function()
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logging.exception(f"Ошибка в фоновой задаче {job.name}")
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            job.running = False
+            job.runs += 1
+            job.last_duration = duration
+            job.max_duration = max(job.max_duration, duration)
+            job.total_duration += duration
+
+    def _loop(self, job: Job):
+        # Сетка запусков без смещения; jitter не накапливается
+        next_run = time.monotonic()
+        delay = random.uniform(0, job.jitter)
+        while not self._stopped.wait(max(0.0, next_run + delay - time.monotonic())):
+            self.run_job(job)
+            next_run += job.interval
+            now = time.monotonic()
+            if next_run < now:
+                missed = int((now - next_run) // job.interval) + 1
+                job.skipped += missed
+                next_run += missed * job.interval
+            delay = random.uniform(0, job.jitter)
+
+    def start(self):
+        """Запускает потоки задач. Вызывается в процессе, который будет
+        их выполнять: потоки не переживают fork."""
+        self._stopped.clear()
+        for job in self.jobs.values():
+            thread = threading.Thread(target=self._loop, args=(job,), name=f"job-{job.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.jobs:
+            logging.info(f"Запущены фоновые задачи: {', '.join(self.jobs)}")
+
+    def stop(self, timeout: float | None = None):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+        self.leader_lock.release()
+
+    def stats(self) -> dict[str, dict]:
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+
+SCHEDULER = Scheduler(engine)
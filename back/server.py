@@ -0,0 +1,249 @@
+import logging
+import os
+import queue
+import select
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable
+from http.server import HTTPServer
+
+from back.config import (
+    SERVER_BACKLOG, SERVER_PROCESSES, SERVER_QUEUE_SIZE, SERVER_REUSE_PORT,
+    SERVER_WORKERS,
+)
+
+
+class SingleHTTPServer(HTTPServer):
+    """Однопоточный HTTPServer с backlog из SERVER_BACKLOG вместо 5 по
+    умолчанию: ожидающие клиенты стоят в очереди ядра, а не получают
+    сброс соединения."""
+    request_queue_size = SERVER_BACKLOG
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """HTTPServer с ограниченным пулом рабочих потоков.
+
+    Принятые соединения кладутся в очередь фиксированной глубины. Когда
+    очередь заполнена, цикл accept блокируется, и новые клиенты ждут
+    в backlog ядра, а не порождают новые потоки.
+    """
+
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        workers: int = SERVER_WORKERS,
+        queue_size: int = SERVER_QUEUE_SIZE,
+        backlog: int = SERVER_BACKLOG,
+        bind_and_activate: bool = True,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.request_queue_size = backlog
+        self.workers = workers
+        self._requests = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        super().__init__(server_address, handler_class, bind_and_activate)
+        for number in range(workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"http-worker-{number}", daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def process_request(self, request, client_address):
+        # Обработка идет в пуле, поэтому соединение не закрываем здесь
+        self._requests.put((request, client_address))
+
+    def _worker(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._threads:
+            self._requests.put(None)
+        for thread in self._threads:
+            thread.join()
+        logging.info("Пул рабочих потоков остановлен")
+
+
+def listen_socket(address, reuse_port: bool = False, backlog: int = SERVER_BACKLOG) -> socket.socket:
+    return socket.create_server(address, backlog=backlog, reuse_port=reuse_port)
+
+
+def server_from_socket(server_class, sock: socket.socket, handler_class, **kwargs) -> HTTPServer:
+    """Создает сервер поверх уже открытого слушающего сокета."""
+    server = server_class(sock.getsockname(), handler_class, bind_and_activate=False, **kwargs)
+    server.socket.close()
+    server.socket = sock
+    server.server_address = sock.getsockname()
+    host, port = server.server_address[:2]
+    server.server_name = socket.getfqdn(host)
+    server.server_port = port
+    return server
+
+
+class PreforkSupervisor:
+    """Запускает N рабочих процессов, обслуживающих один порт.
+
+    Без reuse_port сокет открывается один раз в супервизоре и наследуется
+    процессами; с reuse_port каждый процесс открывает свой сокет с
+    SO_REUSEPORT. Упавшие процессы перезапускаются, SIGHUP выполняет
+    поочередный перезапуск, SIGTERM/SIGINT - остановку.
+
+    server_factory(sock) вызывается уже в дочернем процессе и должен
+    вернуть сервер с методом serve_forever.
+    """
+
+    # Сколько ждать готовности нового процесса при поочередном перезапуске
+    ready_timeout = 10
+    # Сколько ждать завершения процесса после SIGTERM, прежде чем SIGKILL
+    stop_timeout = 30
+    # Процесс, проживший меньше, считается упавшим при старте
+    min_uptime = 1
+
+    def __init__(
+        self,
+        address,
+        server_factory: Callable[[socket.socket], HTTPServer],
+        processes: int = SERVER_PROCESSES,
+        reuse_port: bool = SERVER_REUSE_PORT,
+    ):
+        if processes < 1:
+            raise ValueError("processes must be >= 1")
+        self.address = address
+        self.server_factory = server_factory
+        self.processes = processes
+        self.reuse_port = reuse_port
+        self.socket = None if reuse_port else listen_socket(address)
+        self.workers: dict[int, float] = {}
+        self._stopping = False
+        self._restart_requested = False
+
+    def serve_forever(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        for _ in range(self.processes):
+            self.spawn()
+        try:
+            while not self._stopping:
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                self.reap()
+                time.sleep(0.5)
+        finally:
+            self.stop()
+
+    def spawn(self, wait_ready: bool = False) -> int:
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            self._run_worker(ready_write)
+        os.close(ready_write)
+        self.workers[pid] = time.monotonic()
+        logging.info(f"Запущен рабочий процесс {pid}")
+        if wait_ready:
+            readable, _, _ = select.select([ready_read], [], [], self.ready_timeout)
+            if not readable:
+                logging.warning(f"Процесс {pid} не сообщил о готовности за {self.ready_timeout} сек")
+        os.close(ready_read)
+        return pid
+
+    def _run_worker(self, ready_write: int):
+        code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            sock = listen_socket(self.address, reuse_port=True) if self.reuse_port else self.socket
+            server = self.server_factory(sock)
+
+            def shutdown(signum, frame):
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+            signal.signal(signal.SIGTERM, shutdown)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                os.write(ready_write, b"1")
+            except BrokenPipeError:
+                # Супервизор не ждет готовности этого процесса
+                pass
+            os.close(ready_write)
+            server.serve_forever()
+            server.server_close()
+        except BaseException:
+            logging.exception(f"Рабочий процесс {os.getpid()} завершился с ошибкой")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            logging.warning(
+                f"Рабочий процесс {pid} завершился (код {os.waitstatus_to_exitcode(status)}), перезапускаем"
+            )
+            if time.monotonic() - started < self.min_uptime:
+                time.sleep(self.min_uptime)
+            self.spawn()
+
+    def rolling_restart(self):
+        logging.info("Поочередный перезапуск рабочих процессов")
+        for pid in list(self.workers):
+            self.spawn(wait_ready=True)
+            self._terminate(pid)
+
+    def _terminate(self, pid: int):
+        self.workers.pop(pid, None)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + self.stop_timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if done:
+                return
+            time.sleep(0.1)
+        logging.warning(f"Процесс {pid} не завершился за {self.stop_timeout} сек, SIGKILL")
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+    def stop(self):
+        self._stopping = True
+        for pid in list(self.workers):
+            self._terminate(pid)
+        if self.socket is not None:
+            self.socket.close()
+        logging.info("Все рабочие процессы остановлены")
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame):
+        self._restart_requested = True
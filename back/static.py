@@ -0,0 +1,290 @@
+import mimetypes
+import os
+import secrets
+import stat
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from http.cookies import SimpleCookie
+from urllib.parse import unquote
+
+from back.cache import LRUCache
+from back.compression import EXTENSIONS, compress, compressible, negotiate
+from back.config import (
+    FRONTEND_ROOT, STATIC_CACHE_CONTROL, STATIC_CACHE_CONTROL_DEFAULT,
+    STATIC_COMPRESS_CACHE_BYTES, STATIC_COMPRESS_MAX_SIZE,
+    STATIC_MEMORY_CACHE_BYTES, STATIC_MEMORY_MAX_FILE_SIZE, STATIC_STAT_TTL,
+    STATIC_URL,
+)
+from back.custom_types import FileContent, Response
+
+# Больше диапазонов в одном запросе не обслуживаем - отдаем файл целиком
+MAX_RANGES = 16
+
+
+@dataclass(frozen=True)
+class StaticFile:
+    path: str
+    mimetype: str
+    size: int
+    mtime_ns: int
+    etag: str
+    last_modified: str
+    cache_control: str
+
+
+class StaticFiles:
+    """Таблица статических файлов с закешированными stat() и MIME-типом.
+
+    Результат stat() хранится stat_ttl секунд, MIME-тип вычисляется один
+    раз на расширение. Кешируются только существующие файлы, поэтому
+    запросы к несуществующим путям не раздувают таблицу.
+    """
+
+    def __init__(
+        self,
+        root: str = FRONTEND_ROOT,
+        stat_ttl: float = STATIC_STAT_TTL,
+        cache_control: dict[str, str] = STATIC_CACHE_CONTROL,
+        cache_control_default: str = STATIC_CACHE_CONTROL_DEFAULT,
+    ):
+        self.root = root
+        self.stat_ttl = stat_ttl
+        # Длинные префиксы проверяются первыми
+        self.cache_control = sorted(cache_control.items(), key=lambda item: -len(item[0]))
+        self.cache_control_default = cache_control_default
+        self._files: dict[str, tuple[float, StaticFile]] = {}
+        self._mimetypes: dict[str, str] = {}
+
+    def resolve(self, url_path: str) -> str | None:
+        """Переводит URL в путь на диске, не выпуская его за пределы root."""
+        relative_path = unquote(url_path)
+        # os.stat и open не принимают путь с NUL (ValueError)
+        if "\x00" in relative_path:
+            return None
+        if relative_path.startswith(STATIC_URL):
+            relative_path = relative_path[len(STATIC_URL):]
+        full_path = os.path.normpath(os.path.join(self.root, relative_path.lstrip("/")))
+        if not full_path.startswith(self.root + os.sep):
+            return None
+        return full_path
+
+    def mimetype(self, full_path: str) -> str:
+        extension = os.path.splitext(full_path)[1].lower()
+        mimetype = self._mimetypes.get(extension)
+        if mimetype is None:
+            mimetype = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+            self._mimetypes[extension] = mimetype
+        return mimetype
+
+    def cache_policy(self, full_path: str) -> str:
+        relative_path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+        for prefix, value in self.cache_control:
+            if relative_path.startswith(prefix):
+                return value
+        return self.cache_control_default
+
+    def lookup(self, url_path: str) -> StaticFile | None:
+        full_path = self.resolve(url_path)
+        if full_path is None:
+            return None
+        return self.lookup_file(full_path)
+
+    def lookup_file(self, full_path: str) -> StaticFile | None:
+        now = time.monotonic()
+        entry = self._files.get(full_path)
+        if entry is not None and now - entry[0] < self.stat_ttl:
+            return entry[1]
+        try:
+            result = os.stat(full_path)
+        except OSError:
+            result = None
+        if result is None or not stat.S_ISREG(result.st_mode):
+            self._files.pop(full_path, None)
+            return None
+        file = entry[1] if entry is not None else None
+        if file is None or (file.size, file.mtime_ns) != (result.st_size, result.st_mtime_ns):
+            # Валидаторы пересчитываются только при изменении файла
+            file = StaticFile(
+                path=full_path,
+                mimetype=self.mimetype(full_path),
+                size=result.st_size,
+                mtime_ns=result.st_mtime_ns,
+                etag=f'"{result.st_size:x}-{result.st_mtime_ns:x}"',
+                last_modified=formatdate(result.st_mtime, usegmt=True),
+                cache_control=self.cache_policy(full_path),
+            )
+        self._files[full_path] = (now, file)
+        return file
+
+
+STATIC_FILES = StaticFiles()
+# Сжатые на лету файлы: (путь, mtime_ns, кодировка) -> байты
+COMPRESSED_CACHE = LRUCache(STATIC_COMPRESS_CACHE_BYTES)
+# Содержимое небольших файлов: путь -> (StaticFile, байты)
+ASSET_CACHE = LRUCache(STATIC_MEMORY_CACHE_BYTES, sizeof=lambda entry: len(entry[1]))
+
+
+def file_body(file: StaticFile) -> bytes | FileContent:
+    """Тело файла целиком: из памяти для небольших файлов, иначе sendfile.
+
+    Запись в кеше считается устаревшей, если mtime файла на диске
+    изменился (stat берется из таблицы STATIC_FILES).
+    """
+    if file.size > STATIC_MEMORY_MAX_FILE_SIZE:
+        return FileContent(file.path, 0, file.size)
+    entry = ASSET_CACHE.get(file.path)
+    if entry is not None and entry[0].mtime_ns == file.mtime_ns:
+        return entry[1]
+    with open(file.path, "rb") as f:
+        content = f.read()
+    ASSET_CACHE.set(file.path, (file, content))
+    return content
+
+
+def parse_range(header: str, size: int) -> list[tuple[int, int]] | None:
+    """Разбирает заголовок Range в отсортированные непересекающиеся
+    диапазоны [start, end] включительно.
+
+    None - заголовок некорректен и должен игнорироваться, пустой список -
+    ни один диапазон не попадает в файл (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges = []
+    for item in spec.split(","):
+        start, dash, end = item.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if not start:
+                # Суффикс: последние N байт
+                length = int(end)
+                if length <= 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+                continue
+            start = int(start)
+            end = int(end) if end else None
+        except ValueError:
+            return None
+        if end is None:
+            end = size - 1
+        elif start > end:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def range_response(file: StaticFile, ranges: list[tuple[int, int]], headers: dict) -> Response:
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{file.size}"
+        return Response(206, headers, SimpleCookie(), FileContent(file.path, start, end - start + 1))
+    boundary = secrets.token_hex(16)
+    parts = []
+    for start, end in ranges:
+        parts.append((
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {file.mimetype}\r\n"
+            f"Content-Range: bytes {start}-{end}/{file.size}\r\n\r\n"
+        ).encode())
+        parts.append(FileContent(file.path, start, end - start + 1))
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+    return Response(206, headers, SimpleCookie(), parts)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Слабое сравнение для If-None-Match."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(file: StaticFile, etag: str, request_headers) -> bool:
+    if_none_match = request_headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return file.mtime_ns // 1_000_000_000 <= since
+    return False
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def encoded_content(file: StaticFile, encoding: str) -> bytes | FileContent | None:
+    """Сжатое представление файла: готовый .gz/.br рядом с файлом или
+    байты, сжатые один раз и сохраненные в COMPRESSED_CACHE."""
+    sibling = STATIC_FILES.lookup_file(file.path + EXTENSIONS[encoding])
+    if sibling is not None and sibling.mtime_ns >= file.mtime_ns:
+        return file_body(sibling)
+    if file.size > STATIC_COMPRESS_MAX_SIZE:
+        return None
+    key = (file.path, file.mtime_ns, encoding)
+    compressed = COMPRESSED_CACHE.get(key)
+    if compressed is None:
+        with open(file.path, "rb") as f:
+            compressed = compress(f.read(), encoding)
+        COMPRESSED_CACHE.set(key, compressed)
+    # Сжатие без выигрыша тоже кешируется, чтобы не пересчитывать его
+    return compressed if len(compressed) < file.size else None
+
+
+def static_response(path: str, request_headers) -> Response | None:
+    file = STATIC_FILES.lookup(path)
+    if file is None:
+        return None
+    headers = {
+        "ETag": file.etag,
+        "Last-Modified": file.last_modified,
+        "Cache-Control": file.cache_control,
+    }
+
+    # Диапазоны отдаются только из несжатого файла
+    range_header = request_headers.get("Range")
+    content = None
+    if compressible(file.mimetype):
+        headers["Vary"] = "Accept-Encoding"
+        encoding = None if range_header else negotiate(request_headers.get("Accept-Encoding"))
+        if encoding is not None:
+            content = encoded_content(file, encoding)
+        if content is not None:
+            headers["ETag"] = variant_etag(file.etag, encoding)
+            headers["Content-Encoding"] = encoding
+
+    if not_modified(file, headers["ETag"], request_headers):
+        return Response(304, headers, SimpleCookie(), b"")
+
+    headers["Content-Type"] = file.mimetype
+    if content is not None:
+        return Response(200, headers, SimpleCookie(), content)
+
+    headers["Accept-Ranges"] = "bytes"
+    if_range = request_headers.get("If-Range")
+    # If-Range сравнивается строго: слабый ETag не подходит
+    if range_header and if_range in (None, file.etag, file.last_modified):
+        ranges = parse_range(range_header, file.size)
+        if ranges == []:
+            headers["Content-Range"] = f"bytes */{file.size}"
+            return Response(416, headers, SimpleCookie(), b"")
+        if ranges is not None and len(ranges) <= MAX_RANGES:
+            return range_response(file, ranges, headers)
+
+    return Response(200, headers, SimpleCookie(), file_body(file))
@@ -1,32 +1,30 @@
 import logging
-import threading
-import time
-from datetime import datetime, timedelta
-from typing import Optional
 
+from sqlmodel import Session
+
+from back.config import TOKEN_CLEANUP_INTERVAL, TOKEN_PURGE_INTERVAL, engine
+from back.models import AdminToken
+from back.scheduler import SCHEDULER
 from back.utils import cleanup_expired_tokens, delete_old_inactive_tokens
-from sqlmodel import Session, select
-from back.models import Token
 
-def start_token_cleanup_task(engine, interval: int = 3600):
-    def cleanup_task():
-        while True:
-            try:
-                with Session(engine) as session:
-                    expired_count = cleanup_expired_tokens(session)
-                    if expired_count > 0:
-                        logging.info(f"Периодическая очистка: деактивировано {expired_count} просроченных токенов")
-                    
-                    deleted_count = delete_old_inactive_tokens(session, max_age_days=7)
-                    if deleted_count > 0:
-                        logging.info(f"Периодическая очистка: удалено {deleted_count} старых неактивных токенов")
-            except Exception as e:
-                logging.error(f"Ошибка при очистке токенов: {e}")
-            
-            time.sleep(interval)
-            
-    cleanup_thread = threading.Thread(target=cleanup_task, daemon=True)
-    cleanup_thread.start()
-    logging.info(f"Запущена задача периодической очистки токенов (интервал: {interval} сек)")
-    
-    return cleanup_thread
\ No newline at end of file
+
+# Срок действия токенов проверяется при чтении, очистка только
+# освобождает место в таблицах
+@SCHEDULER.job("token-sweep", TOKEN_CLEANUP_INTERVAL, jitter=TOKEN_CLEANUP_INTERVAL / 10)
+def sweep_expired_tokens():
+    with Session(engine) as session:
+        expired_count = cleanup_expired_tokens(session)
+        if expired_count > 0:
+            logging.info(f"Периодическая очистка: деактивировано {expired_count} просроченных токенов")
+        
+        admin_expired = AdminToken.invalidate_expired(session)
+        if admin_expired > 0:
+            logging.info(f"Периодическая очистка: деактивировано {admin_expired} просроченных токенов администраторов")
+
+
+@SCHEDULER.job("token-purge", TOKEN_PURGE_INTERVAL, jitter=TOKEN_PURGE_INTERVAL / 10)
+def purge_inactive_tokens():
+    with Session(engine) as session:
+        deleted_count = delete_old_inactive_tokens(session, max_age_days=7)
+        if deleted_count > 0:
+            logging.info(f"Периодическая очистка: удалено {deleted_count} старых неактивных токенов")
@@ -1,18 +1,27 @@
+import hashlib
+import logging
 import secrets
 import binascii
+import time
 from datetime import datetime, timedelta
 from email.utils import formatdate
 from http.cookies import SimpleCookie
 from typing import Optional
 
 from sqlalchemy.exc import NoResultFound
-from sqlmodel import Session, select, update
+from sqlmodel import Session, delete, select, update
 
-from back.config import ALPHABET, EPOCH
-from back.models import AdminToken, Token, User
+from back.cache import TokenCache
+from back.config import (
+    ALPHABET, EPOCH, TOKEN_CACHE_NEGATIVE_TTL, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL,
+    TOKEN_CLEANUP_BATCH, TOKEN_REVOCATION_POLL,
+)
+from back.models import AdminToken, Token, TokenRevocation, User
 from back.custom_types import Request, UserNoneType
 from back.validators import RegistrationFormModel
 
+TOKEN_CACHE = TokenCache(TOKEN_CACHE_SIZE, TOKEN_REVOCATION_POLL)
+
 class UserIsNotAuthenticated(Exception):
     pass
 
@@ -34,7 +43,7 @@ def get_user(request: Request, session: Session) -> User:
         authorization = request.headers["Authorization"].strip().split(" ")
         login, password = binascii.a2b_base64(authorization[-1]).decode().split(":")
         user = User.get_by_login(session, login)
-        if not user.check_password(password):
+        if not user.check_password(password, session):
             raise BadPasswordError("Bad password")
         return user
     except KeyError:
@@ -89,9 +98,11 @@ def generate_token(user_id: int, session: Session, expiration_time: int = 3600,
     ).all()
     
     # Если токенов больше лимита, удаляем самые старые
+    revoked = []
     if len(user_tokens) >= max_tokens:
         tokens_to_delete = user_tokens[max_tokens-1:]
         for old_token in tokens_to_delete:
+            revoked.append(old_token.token)
             session.delete(old_token)
     
     # Создаем новый токен
@@ -104,12 +115,60 @@ def generate_token(user_id: int, session: Session, expiration_time: int = 3600,
     )
     session.add(token_entry)
     session.commit()
+    if revoked:
+        revoke_tokens(session, user_tokens=revoked)
     
     return token
 
-def check_token(request: dict, session: Session) -> Optional[int]:
-    token = request.get("Authorization", "").split(" ")[-1]
-    
+def token_key(kind: str, token: str) -> tuple[str, bytes]:
+    """Ключ кеша: в памяти хранится хеш токена, а не сам токен."""
+    return kind, hashlib.sha256(token.encode()).digest()
+
+def revocation_version(session: Session) -> int:
+    revocation = session.get(TokenRevocation, 1)
+    return revocation.version if revocation else 0
+
+def revoke_tokens(session: Session, user_tokens=(), admin_tokens=()):
+    """Сбрасывает кеш проверки токенов после их отзыва.
+
+    Записи этого процесса удаляются сразу, остальные процессы сбросят
+    кеш, заметив новую версию отзыва (не позже TOKEN_REVOCATION_POLL).
+    Вызывается после коммита изменения токенов.
+    """
+    updated = session.exec(
+        update(TokenRevocation)
+        .where(TokenRevocation.id == 1)
+        .values(version=TokenRevocation.version + 1)
+    ).rowcount
+    if not updated:
+        session.add(TokenRevocation(id=1, version=1))
+    session.commit()
+    TOKEN_CACHE.invalidate(
+        *(token_key("user", token) for token in user_tokens),
+        *(token_key("admin", token) for token in admin_tokens),
+    )
+
+def cached_token_lookup(kind: str, token: str, session: Session, lookup) -> Optional[int]:
+    """Результат lookup(session, token) -> (id или None, expiration_time)
+    из кеша. Положительный результат хранится не дольше срока токена."""
+    if TOKEN_CACHE_TTL <= 0:
+        return lookup(session, token)[0]
+    if TOKEN_CACHE.poll_due():
+        TOKEN_CACHE.sync(revocation_version(session))
+    key = token_key(kind, token)
+    found, subject = TOKEN_CACHE.lookup(key)
+    if found:
+        return subject
+    generation = TOKEN_CACHE.generation
+    subject, expiration_time = lookup(session, token)
+    if subject is None:
+        ttl = TOKEN_CACHE_NEGATIVE_TTL
+    else:
+        ttl = min(TOKEN_CACHE_TTL, (expiration_time - datetime.now()).total_seconds())
+    TOKEN_CACHE.remember(key, subject, ttl, generation)
+    return subject
+
+def _lookup_user_token(session: Session, token: str) -> tuple[Optional[int], Optional[datetime]]:
     token_entry = session.exec(select(Token).where(
         Token.token == token,
         Token.active == True
@@ -117,86 +176,77 @@ def check_token(request: dict, session: Session) -> Optional[int]:
     
     if token_entry:
         if token_entry.expiration_time > datetime.now():
-            return token_entry.user_id
+            return token_entry.user_id, token_entry.expiration_time
         else:
             token_entry.active = False
             session.commit()
     
-    return None
+    return None, None
 
-# Добавьте новые функции для управления токенами
-def cleanup_expired_tokens(session: Session) -> int:
-    now = datetime.now()
-    
-    expired_tokens = session.exec(
-        select(Token)
-        .where(Token.expiration_time < now, Token.active == True)
-    ).all()
-    
-    count = 0
-    for token in expired_tokens:
-        token.active = False
-        count += 1
-    
-    if count > 0:
+def check_token(request: dict, session: Session) -> Optional[int]:
+    token = request.get("Authorization", "").split(" ")[-1]
+    return cached_token_lookup("user", token, session, _lookup_user_token)
+
+def execute_batched(session: Session, statement, label: str, batch_size: int = TOKEN_CLEANUP_BATCH) -> int:
+    """Выполняет UPDATE/DELETE порциями по batch_size строк с коммитом
+    после каждой: блокировки держатся недолго, а строки не загружаются
+    в память. Возвращает общее число затронутых строк.
+
+    LIMIT в UPDATE/DELETE есть только в MySQL, в других СУБД оператор
+    выполняется целиком за одну порцию.
+    """
+    statement = (
+        statement
+        .with_dialect_options(mysql_limit=batch_size)
+        # Без синхронизации сессия не выбирает заранее все подходящие строки
+        .execution_options(synchronize_session=False)
+    )
+    total = 0
+    while True:
+        started = time.perf_counter()
+        rows = session.exec(statement).rowcount
         session.commit()
-        
-    return count
+        total += rows
+        if rows > 0:
+            logging.info(f"{label}: {rows} строк за {(time.perf_counter() - started) * 1000:.1f} мс")
+        if rows < batch_size:
+            return total
+
+def cleanup_expired_tokens(session: Session) -> int:
+    return execute_batched(
+        session,
+        update(Token)
+        .where(Token.active == True, Token.expiration_time < datetime.now())
+        .values(active=False),
+        "Деактивация просроченных токенов",
+    )
 
 def delete_old_inactive_tokens(session: Session, max_age_days: int = 30) -> int:
     cutoff_date = datetime.now() - timedelta(days=max_age_days)
-    
-    # Находим старые неактивные токены
-    old_tokens = session.exec(
-        select(Token)
-        .where(Token.expiration_time < cutoff_date, Token.active == False)
-    ).all()
-    
-    # Удаляем их
-    count = 0
-    for token in old_tokens:
-        session.delete(token)
-        count += 1
-    
-    if count > 0:
-        session.commit()
-        
-    return count
-
-def delete_inactive_tokens(session: Session) -> int:
-    """Удаляет все неактивные токены, независимо от их возраста"""
-    
-    # Находим все неактивные токены
-    inactive_tokens = session.exec(
-        select(Token)
-        .where(Token.active == False)
-    ).all()
-    
-    # Удаляем их
-    count = 0
-    for token in inactive_tokens:
-        session.delete(token)
-        count += 1
-    
-    if count > 0:
-        session.commit()
-        
-    return count
+    return execute_batched(
+        session,
+        delete(Token).where(Token.active == False, Token.expiration_time < cutoff_date),
+        "Удаление старых неактивных токенов",
+    )
 
 def invalidate_all_user_tokens(session: Session, user_id: int) -> int:
     """Деактивирует все токены пользователя"""
-    user_tokens = session.exec(
-        select(Token)
+    # Значения нужны только для сброса кеша проверки токенов
+    revoked = session.exec(
+        select(Token.token)
         .where(Token.user_id == user_id, Token.active == True)
     ).all()
     
-    count = 0
-    for token in user_tokens:
-        token.active = False
-        count += 1
+    count = execute_batched(
+        session,
+        update(Token)
+        .where(Token.user_id == user_id, Token.active == True)
+        .values(active=False),
+        f"Деактивация токенов пользователя {user_id}",
+    )
     
     if count > 0:
-        session.commit()
+        revoke_tokens(session, user_tokens=revoked)
         
     return count
 
@@ -217,6 +267,11 @@ def generate_admin_token(admin_id: int, session: Session) -> str:
     session.commit()
     return token_value
 
+def _lookup_admin_token(session: Session, token_value: str) -> tuple[Optional[int], Optional[datetime]]:
+    # Просроченные токены деактивирует фоновая очистка (back.token_manager)
+    token = AdminToken.get_by_token(session, token_value)
+    return (token.admin_id, token.expiration_time) if token else (None, None)
+
 def check_admin_token(headers: dict, session: Session) -> Optional[int]:
     """Checks if admin token is valid and returns admin_id if it is"""
     auth_header = headers.get("Authorization", "")
@@ -224,20 +279,4 @@ def check_admin_token(headers: dict, session: Session) -> Optional[int]:
         return None
     
     token_value = auth_header[7:]
-    
-    # Проверяем и инвалидируем просроченные токены
-    session.exec(
-        update(AdminToken)
-        .where(AdminToken.expiration_time < datetime.now())
-        .where(AdminToken.active == True)
-        .values(active=False)
-    )
-    
-    # Ищем активный токен
-    token = session.exec(
-        select(AdminToken)
-        .where(AdminToken.token == token_value)
-        .where(AdminToken.active == True)
-    ).first()
-    
-    return token.admin_id if token else None
\ No newline at end of file
+    return cached_token_lookup("admin", token_value, session, _lookup_admin_token)
@@ -0,0 +1,138 @@
+"""Проверка токена администратора при одновременных запросах.
+
+Несколько потоков-"администраторов" проверяют свои токены так же, как
+это делает /admin/dashboard:
+
+  legacy - прежний путь: UPDATE просроченных токенов, затем SELECT;
+  read   - текущий AdminToken.get_by_token: только SELECT по индексу
+           с условием на срок действия.
+
+Кеш проверки токенов (back.utils.TOKEN_CACHE) здесь не участвует -
+измеряется каждое обращение к базе. Столбцы: проверок в секунду,
+95-й процентиль задержки и прирост Innodb_row_lock_waits /
+Innodb_row_lock_time за прогон.
+
+Нужна настоящая база MySQL с примененными миграциями (переменные DB_* как
+у приложения). Бенчмарк создает временного администратора и удаляет его
+вместе с токенами в конце.
+
+    python -m bench.bench_admin_tokens
+"""
+import secrets
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlmodel import Session, delete, select, update
+
+from bench import common  # noqa: F401
+from back.config import engine
+from back.models import Admin, AdminToken
+
+DURATION = 5.0
+ADMINS = (1, 4, 8, 16)
+# Просроченные токены, которые прежний путь каждый раз пытается обновить
+EXPIRED_TOKENS = 200
+
+
+def legacy_lookup(session: Session, token_value: str):
+    session.exec(
+        update(AdminToken)
+        .where(AdminToken.expiration_time < datetime.now())
+        .where(AdminToken.active == True)
+        .values(active=False)
+    )
+    session.commit()
+    return session.exec(
+        select(AdminToken)
+        .where(AdminToken.token == token_value)
+        .where(AdminToken.active == True)
+    ).first()
+
+
+def read_lookup(session: Session, token_value: str):
+    token = AdminToken.get_by_token(session, token_value)
+    # Завершаем транзакцию, как это делает закрытие сессии после запроса
+    session.rollback()
+    return token
+
+
+def lock_status() -> dict[str, int]:
+    with engine.connect() as connection:
+        rows = connection.execute(text("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_%'"))
+        return {name: int(value) for name, value in rows}
+
+
+def setup(admin_id: int, count: int) -> list[str]:
+    """Действующие токены для потоков и просроченные - активные, чтобы
+    прежнему UPDATE было что блокировать."""
+    now = datetime.now()
+    tokens = [secrets.token_urlsafe(32) for _ in range(count)]
+    with Session(engine) as session:
+        session.exec(delete(AdminToken).where(AdminToken.admin_id == admin_id))
+        for token in tokens:
+            session.add(AdminToken(admin_id=admin_id, token=token, expiration_time=now + timedelta(hours=1)))
+        for _ in range(EXPIRED_TOKENS):
+            session.add(AdminToken(
+                admin_id=admin_id, token=secrets.token_urlsafe(32), expiration_time=now - timedelta(hours=1),
+            ))
+        session.commit()
+    return tokens
+
+
+def run(lookup, tokens: list[str]) -> dict:
+    latencies: list[list[float]] = [[] for _ in tokens]
+    deadline = time.perf_counter() + DURATION
+
+    def admin(index: int):
+        with Session(engine) as session:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                if lookup(session, tokens[index]) is None:
+                    raise RuntimeError("token not found")
+                latencies[index].append(time.perf_counter() - started)
+
+    before = lock_status()
+    threads = [threading.Thread(target=admin, args=(index,)) for index in range(len(tokens))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    after = lock_status()
+    samples = sorted(latency for thread_latencies in latencies for latency in thread_latencies)
+    return {
+        "rps": len(samples) / DURATION,
+        "p95_ms": statistics.quantiles(samples, n=20)[-1] * 1000 if len(samples) > 1 else 0.0,
+        "lock_waits": after["Innodb_row_lock_waits"] - before["Innodb_row_lock_waits"],
+        "lock_ms": after["Innodb_row_lock_time"] - before["Innodb_row_lock_time"],
+    }
+
+
+def main():
+    engine.echo = False
+    with Session(engine) as session:
+        admin = Admin(username=f"bench-{secrets.token_hex(4)}", password_hash="", password_salt="")
+        session.add(admin)
+        session.commit()
+        admin_id = admin.id
+    try:
+        print(f"{'admins':>6} {'path':<7}{'checks/s':>10}{'p95 ms':>9}{'lock waits':>12}{'lock ms':>9}")
+        for count in ADMINS:
+            for title, lookup in (("legacy", legacy_lookup), ("read", read_lookup)):
+                tokens = setup(admin_id, count)
+                result = run(lookup, tokens)
+                print(
+                    f"{count:>6} {title:<7}{result['rps']:>10.0f}{result['p95_ms']:>9.2f}"
+                    f"{result['lock_waits']:>12}{result['lock_ms']:>9}"
+                )
+    finally:
+        with Session(engine) as session:
+            session.exec(delete(AdminToken).where(AdminToken.admin_id == admin_id))
+            session.exec(delete(Admin).where(Admin.id == admin_id))
+            session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Холодная загрузка страницы / с keep-alive и без него.
+
+Клиент ведет себя как браузер: загружает HTML, затем все ресурсы из
+/front/ через 6 параллельных соединений. В режиме close на каждый
+ресурс открывается новое TCP-соединение. На loopback рукопожатие почти
+бесплатно, поэтому реальная экономия при сетевой задержке больше.
+
+    python -m bench.bench_keepalive
+"""
+import re
+import statistics
+import threading
+import time
+from http.client import HTTPConnection
+
+from bench.common import running
+from back.handler import HTTPHandler
+from back.server import ThreadPoolHTTPServer
+
+ROUNDS = 30
+PARALLEL = 6
+ASSET_RE = re.compile(r'(?:src|href)="(/front/[^"]+)"')
+
+
+def page_load(address, keep_alive: bool) -> float:
+    headers = {} if keep_alive else {"Connection": "close"}
+    started = time.perf_counter()
+    connection = HTTPConnection(*address)
+    connection.request("GET", "/", headers=headers)
+    html = connection.getresponse().read().decode()
+    assets = list(dict.fromkeys(ASSET_RE.findall(html)))
+
+    def client(paths, connection):
+        for path in paths:
+            if not keep_alive:
+                connection.close()
+                connection = HTTPConnection(*address)
+            connection.request("GET", path, headers=headers)
+            connection.getresponse().read()
+        connection.close()
+
+    connections = [connection] + [HTTPConnection(*address) for _ in range(PARALLEL - 1)]
+    threads = [
+        threading.Thread(target=client, args=(assets[number::PARALLEL], connections[number]))
+        for number in range(PARALLEL)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    HTTPHandler.log_message = lambda *args: None
+    with running(ThreadPoolHTTPServer(("127.0.0.1", 0), HTTPHandler, workers=16)) as address:
+        page_load(address, True)
+        results = {}
+        for keep_alive in (False, True):
+            samples = [page_load(address, keep_alive) for _ in range(ROUNDS)]
+            results[keep_alive] = statistics.median(samples) * 1000
+    print(f"connection: close  {results[False]:8.2f} ms")
+    print(f"keep-alive         {results[True]:8.2f} ms")
+    print(f"saved              {results[False] - results[True]:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
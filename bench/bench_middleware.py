@@ -0,0 +1,62 @@
+"""Накладные расходы цепочки промежуточных слоев.
+
+Сравнивается прямой вызов последнего звена с цепочками из 0..8 пустых
+слоев трех видов: только before, before + after и функция-обертка.
+Обработчик маршрута тривиальный, поэтому разница - чистая стоимость
+цепочки на один запрос.
+
+    python -m bench.bench_middleware
+"""
+import timeit
+from http.cookies import SimpleCookie
+
+from bench import common  # noqa: F401
+from back.custom_types import Response, Route
+from back.middleware import Middleware, compose
+
+CALLS = 200000
+RESPONSE = Response(200, {}, SimpleCookie(), b"")
+ROUTE = Route(lambda: RESPONSE, "/")
+
+
+def endpoint(handler, route):
+    return RESPONSE
+
+
+class Before(Middleware):
+    def before(self, handler, route):
+        return None
+
+
+class BeforeAfter(Middleware):
+    def before(self, handler, route):
+        return None
+
+    def after(self, handler, route, response):
+        return response
+
+
+def wrapper(call_next):
+    def call(handler, route):
+        return call_next(handler, route)
+    return call
+
+
+def per_call_ns(call) -> float:
+    return timeit.timeit(lambda: call(None, ROUTE), number=CALLS) / CALLS * 1e9
+
+
+def main():
+    direct = per_call_ns(endpoint)
+    print(f"direct dispatch: {direct:.0f} ns")
+    print(f"{'layers':>6} {'before ns':>10} {'before+after ns':>16} {'function ns':>12}")
+    for count in (0, 1, 4, 8):
+        results = [
+            per_call_ns(compose([factory() for _ in range(count)], endpoint)) - direct
+            for factory in (Before, BeforeAfter, lambda: wrapper)
+        ]
+        print(f"{count:>6} {results[0]:>10.0f} {results[1]:>16.0f} {results[2]:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Пропускная способность входа в зависимости от стоимости хеша.
+
+Маршрут /bench/login проверяет пароль так же, как login_user, но без
+базы: хеш заранее посчитан с нужным числом итераций. Для каждого числа
+итераций сравниваются вычисление в потоке запроса (workers=0) и пул
+процессов разного размера. Столбцы: входов в секунду и задержка
+одного входа без нагрузки.
+
+По таблице выбирается PASSWORD_HASH_ITERATIONS: наибольшая стоимость,
+при которой пиковый поток входов укладывается в запас по CPU, и
+PASSWORD_HASH_WORKERS - с учетом числа процессов сервера.
+
+    python -m bench.bench_passwords
+"""
+import os
+import time
+from http.cookies import SimpleCookie
+
+from bench.common import fetch, load, running
+from back import passwords
+from back.custom_types import Response
+from back.handler import HTTPHandler
+from back.passwords import PasswordHasher
+from back.server import ThreadPoolHTTPServer
+
+ITERATIONS = (100000, 300000, 600000)
+WORKERS = sorted({0, 1, 2, os.cpu_count() or 1})
+TOTAL = 200
+CONCURRENCY = 16
+PASSWORD = "bench-password"
+STORED = {}
+
+
+@HTTPHandler.route(["GET"], "/bench/login")
+def bench_login(iterations: int) -> Response:
+    ok = passwords.verify_password(PASSWORD, STORED[iterations])
+    return Response(200 if ok else 401, {"Content-Type": "text/plain"}, SimpleCookie(), "ok")
+
+
+def main():
+    HTTPHandler.log_message = lambda *args: None
+    for iterations in ITERATIONS:
+        STORED[iterations] = passwords.hash_password(PASSWORD, iterations)
+    print(f"{'iterations':>10}{'workers':>9}{'logins/s':>10}{'single ms':>11}")
+    server = ThreadPoolHTTPServer(("127.0.0.1", 0), HTTPHandler, workers=CONCURRENCY)
+    with running(server) as address:
+        for iterations in ITERATIONS:
+            path = f"/bench/login?iterations={iterations}"
+            for workers in WORKERS:
+                passwords.HASHER = PasswordHasher(workers, CONCURRENCY, timeout=60)
+                # Прогрев: запуск процессов пула не входит в замер
+                fetch(address, path)
+                started = time.perf_counter()
+                fetch(address, path)
+                single = (time.perf_counter() - started) * 1000
+                rps = load(address, path, TOTAL, CONCURRENCY)
+                passwords.HASHER.shutdown()
+                print(f"{iterations:>10}{workers:>9}{rps:>10.1f}{single:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Время поиска маршрута в зависимости от числа маршрутов.
+
+Сравнивается Router с прежним линейным перебором шаблонов из
+HTTPHandler.find_dynamic_handler.
+
+    python -m bench.bench_router
+"""
+import timeit
+
+from bench import common  # noqa: F401
+from back.router import Router
+
+LOOKUPS = 20000
+
+
+def linear_match(dynamic_paths: dict, path: str):
+    for pattern, handler in dynamic_paths.items():
+        path_parts = path.split('/')
+        pattern_parts = pattern.split('/')
+        if len(path_parts) != len(pattern_parts):
+            continue
+        params = {}
+        for path_part, pattern_part in zip(path_parts, pattern_parts):
+            if pattern_part.startswith('{') and pattern_part.endswith('}'):
+                params[pattern_part[1:-1]] = path_part
+            elif path_part != pattern_part:
+                break
+        else:
+            return handler, params
+    return None, {}
+
+
+def synthetic_routes(count: int) -> list[tuple[str, str]]:
+    routes = []
+    for number in range(count):
+        routes.append((f"/resource{number}/{{item_id:int}}", f"/resource{number}/42"))
+        routes.append((f"/resource{number}/{{item_id:int}}/edit", f"/resource{number}/42/edit"))
+    return routes
+
+
+def main():
+    print(f"{'routes':>7} {'radix us':>9} {'linear us':>10}")
+    for count in (10, 100, 300):
+        routes = synthetic_routes(count)
+        router = Router()
+        dynamic_paths = {}
+        for pattern, _ in routes:
+            router.add("GET", pattern, pattern)
+            dynamic_paths[pattern.replace(":int", "")] = pattern
+        # Худший случай для перебора - последний зарегистрированный маршрут
+        _, path = routes[-1]
+        assert router.match("GET", path)[0] == linear_match(dynamic_paths, path)[0]
+        radix = timeit.timeit(lambda: router.match("GET", path), number=LOOKUPS)
+        linear = timeit.timeit(lambda: linear_match(dynamic_paths, path), number=LOOKUPS)
+        print(f"{len(routes):>7} {radix / LOOKUPS * 1e6:9.2f} {linear / LOOKUPS * 1e6:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
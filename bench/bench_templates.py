@@ -0,0 +1,80 @@
+"""Компиляция шаблонов при запуске и задержка первого запроса.
+
+Каждый вариант запускается в отдельном процессе, чтобы кеш шаблонов в
+памяти был пустым, как у только что запущенного рабочего процесса:
+
+  development - auto_reload включен, кеша байткода нет (прежнее поведение);
+  production, холодный кеш - первый запуск после развертывания;
+  production, теплый кеш - последующие запуски и новые рабочие процессы.
+
+Столбцы: время warm_up_templates, время первого рендера index.html без
+прогрева и после него, среднее время get_template + render на горячем
+процессе.
+
+    python -m bench.bench_templates
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench import common  # noqa: F401
+
+RENDERS = 2000
+CONTEXT = {"STATIC_URL": "/front/", "DEFAULT_URL": "/", "errors": {}, "form_data": {}}
+
+
+def child(warm_up: bool):
+    started = time.perf_counter()
+    import back.handler  # noqa: F401 - регистрирует asset() в окружении
+    from back.config import TEMPLATE_ENVIRONMENT
+    from back.main import warm_up_templates
+    result = {"import_ms": (time.perf_counter() - started) * 1000}
+
+    started = time.perf_counter()
+    if warm_up:
+        warm_up_templates()
+    result["warm_up_ms"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    TEMPLATE_ENVIRONMENT.get_template("index.html").render(**CONTEXT)
+    result["first_ms"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        TEMPLATE_ENVIRONMENT.get_template("index.html").render(**CONTEXT)
+    result["steady_us"] = (time.perf_counter() - started) / RENDERS * 1e6
+    print(json.dumps(result))
+
+
+def run(env: dict, warm_up: bool) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, "-m", "bench.bench_templates", "--child", "warm" if warm_up else "cold"],
+        env={**os.environ, **env},
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        production = {"APP_ENV": "production", "TEMPLATE_CACHE_DIR": cache_dir}
+        variants = [
+            ("development", {"APP_ENV": "development", "TEMPLATE_CACHE_DIR": ""}, False),
+            ("development + warm-up", {"APP_ENV": "development", "TEMPLATE_CACHE_DIR": ""}, True),
+            ("production, cold cache", production, True),
+            ("production, warm cache", production, True),
+            ("production, no warm-up", production, False),
+        ]
+        print(f"{'variant':<26}{'warm-up ms':>11}{'first ms':>10}{'steady us':>11}")
+        for title, env, warm_up in variants:
+            result = run(env, warm_up)
+            print(f"{title:<26}{result['warm_up_ms']:>11.1f}{result['first_ms']:>10.2f}{result['steady_us']:>11.1f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2] == "warm")
+    else:
+        main()
@@ -0,0 +1,44 @@
+"""RPS в зависимости от числа рабочих потоков ThreadPoolHTTPServer.
+
+Маршрут /bench/io имитирует медленный запрос к MySQL (time.sleep
+отпускает GIL так же, как ожидание ответа от базы).
+
+    python -m bench.bench_workers
+"""
+import time
+from http.cookies import SimpleCookie
+
+from bench.common import load, running
+from back.custom_types import Request, Response
+from back.handler import HTTPHandler
+from back.main import create_server
+from back.server import ThreadPoolHTTPServer
+
+IO_DELAY = 0.02
+TOTAL = 400
+CONCURRENCY = 32
+
+
+@HTTPHandler.route(["GET"], "/bench/io")
+def bench_io(request: Request) -> Response:
+    time.sleep(IO_DELAY)
+    return Response(200, {"Content-Type": "text/plain"}, SimpleCookie(), "ok")
+
+
+def main():
+    HTTPHandler.log_message = lambda *args: None
+    # Базовая строка - настоящий режим single: те же max_requests и backlog
+    max_requests = HTTPHandler.max_requests
+    with running(create_server("single", ("127.0.0.1", 0))) as address:
+        rps = load(address, "/bench/io", TOTAL, CONCURRENCY)
+    HTTPHandler.max_requests = max_requests
+    print(f"{'single':>8}: {rps:8.1f} req/s")
+    for workers in (1, 2, 4, 8, 16, 32):
+        server = ThreadPoolHTTPServer(("127.0.0.1", 0), HTTPHandler, workers=workers)
+        with running(server) as address:
+            rps = load(address, "/bench/io", TOTAL, CONCURRENCY)
+        print(f"{workers:>8}: {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Общие помощники для бенчмарков.
+
+Бенчмарки запускаются из корня репозитория: python -m bench.<имя>.
+База данных для них не нужна: back.config создает движок лениво, а
+измеряемые маршруты регистрируются прямо в бенчмарке.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.client import HTTPConnection
+
+os.environ.setdefault("DB_PASSWORD", "bench")
+
+
+@contextmanager
+def running(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def fetch(address, path: str, headers: dict | None = None) -> bytes:
+    connection = HTTPConnection(*address, timeout=30)
+    try:
+        connection.request("GET", path, headers=headers or {})
+        return connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def load(address, path: str, total: int, concurrency: int) -> float:
+    """Отправляет total запросов из concurrency потоков, возвращает RPS.
+
+    Если часть запросов завершилась ошибкой, RPS был бы завышен, поэтому
+    после завершения всех потоков поднимается RuntimeError.
+    """
+    counter = iter(range(total))
+    lock = threading.Lock()
+    errors: list[Exception] = []
+
+    def client():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            try:
+                fetch(address, path)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(f"{len(errors)} из {total} запросов к {path} завершились ошибкой: {errors[0]!r}")
+    return total / elapsed